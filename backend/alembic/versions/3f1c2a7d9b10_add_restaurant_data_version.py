@@ -0,0 +1,37 @@
+"""add restaurants.data_version
+
+Databases created before data_version existed only get new tables from
+create_all at startup, not new columns on existing tables; run
+`alembic upgrade head` once against them. Safe on databases create_all
+already built with the column.
+
+Revision ID: 3f1c2a7d9b10
+Revises: 
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7d9b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table, column):
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    if not _has_column("restaurants", "data_version"):
+        op.add_column(
+            "restaurants",
+            sa.Column("data_version", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade():
+    op.drop_column("restaurants", "data_version")
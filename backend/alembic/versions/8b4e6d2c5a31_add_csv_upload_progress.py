@@ -0,0 +1,54 @@
+"""add csv_uploads ingestion progress columns
+
+Uploads from before checkpointed ingestion are marked completed if they
+were processed and failed otherwise, so none of them is resumed from
+offset 0 on top of rows it already wrote.
+
+Revision ID: 8b4e6d2c5a31
+Revises: 3f1c2a7d9b10
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e6d2c5a31'
+down_revision = '3f1c2a7d9b10'
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    ("status", sa.String(), dict(nullable=False, server_default="pending")),
+    ("byte_offset", sa.BigInteger(), dict(nullable=False, server_default="0")),
+    ("rows_processed", sa.Integer(), dict(nullable=False, server_default="0")),
+    ("error", sa.Text(), {}),
+    ("lease_token", sa.String(), {}),
+    ("updated_at", sa.DateTime(timezone=True), {}),
+]
+
+
+def _existing_columns(table):
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    existing = _existing_columns("csv_uploads")
+    if "status" in existing:
+        return
+    for name, type_, options in COLUMNS:
+        if name not in existing:
+            op.add_column("csv_uploads", sa.Column(name, type_, **options))
+    op.execute(
+        "UPDATE csv_uploads SET status = CASE WHEN processed THEN 'completed' ELSE 'failed' END, "
+        "updated_at = CURRENT_TIMESTAMP"
+    )
+    # SQLite cannot add a column with a non-constant default or alter one later
+    if op.get_bind().dialect.name != "sqlite":
+        op.alter_column("csv_uploads", "updated_at", server_default=sa.func.now())
+
+
+def downgrade():
+    for name, _, _ in reversed(COLUMNS):
+        op.drop_column("csv_uploads", name)
@@ -1,10 +1,11 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from ..core.database import get_db
 from ..core.config import settings
 from ..core.security import verify_token
+from ..core.profiling import has_profiling_token
 from ..models.user import User
 from ..services.auth import get_user_by_username
 
@@ -31,4 +32,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+def require_profiling_token(request: Request):
+    # Profiles expose internals, so they need the same token that enables profiling
+    if not has_profiling_token(request.headers):
+        raise HTTPException(status_code=404, detail="Not found")
@@ -1,43 +1,179 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List
-from ...core.database import get_db
+from typing import List, Optional
+from ...core.config import settings
+from ...core.database import SessionLocal, get_read_db, route_reads_for_restaurant
+from ...core.etag import make_etag, etag_matches, set_cache_headers, not_modified
+from ...core.profiling import ProfiledRoute
+from ...core.security import create_stream_ticket, verify_stream_ticket
 from ...models.user import User
 from ...models.restaurant import Restaurant
-from ...schemas.sales import AnalyticsRequest, AnalyticsResponse
-from ...services.sales import get_sales_analytics
-from ...services.openai_service import detect_anomalies, generate_insights
+from ...schemas.sales import AnalyticsRequest, AnalyticsResponse, LiveTicket, SalesForecast
+from ...services.analytics import get_analytics_coalesced
+from ...services.forecast import get_sales_forecast
+from ...services.live import KEEPALIVE, live_sales, sse_event
+from ...services.auth import get_user_by_username
 from ...api.deps import get_current_active_user
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
-@router.post("/", response_model=AnalyticsResponse)
-def get_analytics(
-    request: AnalyticsRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
+class _ServiceJSONResponse(ORJSONResponse):
+    # Service results go out as built: numpy scalars from pandas and
+    # non-string keys such as hours of the day
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+def _json_response(content, etag: str) -> ORJSONResponse:
+    # Returning a response skips response_model validation and
+    # jsonable_encoder; response_model only documents the schema
+    response = _ServiceJSONResponse(content)
+    set_cache_headers(response, etag)
+    return response
+
+def _get_owned_restaurant(db: Session, restaurant_id: int, current_user: User) -> Restaurant:
+    route_reads_for_restaurant(db, restaurant_id)
+    
     restaurant = db.query(Restaurant).filter(
-        Restaurant.id == request.restaurant_id,
+        Restaurant.id == restaurant_id,
         Restaurant.owner_id == current_user.id
     ).first()
     
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
+    return restaurant
+
+def _analytics(
+    request: AnalyticsRequest,
+    http_request: Request,
+    current_user: User,
+    db: Session,
+    conditional: bool
+):
+    restaurant = _get_owned_restaurant(db, request.restaurant_id, current_user)
+    
+    # Results only change when sales are ingested for the restaurant
+    etag = make_etag("analytics", restaurant.id, restaurant.data_version, request.start_date, request.end_date)
+    if conditional and etag_matches(http_request, etag):
+        return not_modified(etag)
     
-    analytics_data = get_sales_analytics(
+    analytics_data = get_analytics_coalesced(
         db=db,
+        user_id=current_user.id,
         restaurant_id=request.restaurant_id,
         start_date=request.start_date,
         end_date=request.end_date
     )
+    return _json_response(analytics_data, etag)
+
+@router.get("/", response_model=AnalyticsResponse)
+def read_analytics(
+    http_request: Request,
+    restaurant_id: int,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_read_db)
+):
+    try:
+        request = AnalyticsRequest(restaurant_id=restaurant_id, start_date=start_date, end_date=end_date)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    return _analytics(request, http_request, current_user, db, conditional=True)
+
+@router.post("/", response_model=AnalyticsResponse)
+def get_analytics(
+    request: AnalyticsRequest,
+    http_request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_read_db)
+):
+    # Conditional requests are only answered with 304 on GET
+    return _analytics(request, http_request, current_user, db, conditional=False)
+
+@router.get("/forecast", response_model=SalesForecast)
+def read_forecast(
+    http_request: Request,
+    restaurant_id: int,
+    horizon_days: int = Query(14, ge=1, le=settings.FORECAST_MAX_HORIZON_DAYS),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_read_db)
+):
+    restaurant = _get_owned_restaurant(db, restaurant_id, current_user)
+    
+    # Forecasts only change when sales are ingested for the restaurant
+    etag = make_etag("forecast", restaurant.id, restaurant.data_version, horizon_days)
+    if etag_matches(http_request, etag):
+        return not_modified(etag)
+    
+    return _json_response(get_sales_forecast(db, restaurant_id, horizon_days), etag)
+
+@router.post("/live/ticket", response_model=LiveTicket)
+def create_live_ticket(
+    restaurant_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Short-lived ticket for opening the live stream of one restaurant, so the
+    access token never has to appear in a URL
+    """
+    _get_owned_restaurant(db, restaurant_id, current_user)
+    return {
+        "ticket": create_stream_ticket(current_user.username, restaurant_id),
+        "expires_in": settings.LIVE_TICKET_SECONDS
+    }
+
+def _authorize_live(ticket: str, restaurant_id: int) -> int:
+    username = verify_stream_ticket(ticket, restaurant_id)
+    # Streams stay open for hours, so don't hold a pooled connection for them
+    db = SessionLocal()
+    try:
+        user = get_user_by_username(db, username=username)
+        if user is None or not user.is_active:
+            raise HTTPException(status_code=401, detail="Invalid or expired stream ticket")
+        return _get_owned_restaurant(db, restaurant_id, user).data_version
+    finally:
+        db.close()
+
+@router.get("/live")
+async def live_analytics(
+    http_request: Request,
+    restaurant_id: int,
+    ticket: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """
+    Server-sent events with increments to the analytics aggregates as sales
+    are ingested. EventSource cannot set headers, so the stream is opened with
+    a ticket from POST /live/ticket in the query string; it is only checked
+    on connect. On "ready" or "resync", fetch the full analytics.
+    """
+    try:
+        request = AnalyticsRequest(restaurant_id=restaurant_id, start_date=start_date, end_date=end_date)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    data_version = await run_in_threadpool(_authorize_live, ticket, restaurant_id)
     
-    # Use OpenAI to detect anomalies
-    anomalies = detect_anomalies(analytics_data)
-    analytics_data["anomalies"] = anomalies
+    range_key = (request.start_date, request.end_date)
+    queue = live_sales.subscribe(restaurant_id, range_key)
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Too many live connections", headers={"Retry-After": "30"})
     
-    # Use OpenAI to generate insights
-    insights = generate_insights(analytics_data)
-    analytics_data["insights"] = insights
+    async def stream():
+        try:
+            yield b"retry: 5000\n" + sse_event("ready", {"restaurant_id": restaurant_id, "data_version": data_version})
+            while not await http_request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), settings.LIVE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+        finally:
+            live_sales.unsubscribe(restaurant_id, range_key, queue)
     
-    return analytics_data
\ No newline at end of file
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
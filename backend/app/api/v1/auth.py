@@ -5,11 +5,12 @@ from sqlalchemy.orm import Session
 from ...core.database import get_db
 from ...core.config import settings
 from ...core.security import create_access_token
+from ...core.profiling import ProfiledRoute
 from ...schemas.user import Token, UserCreate, User as UserSchema
 from ...services.auth import authenticate_user, create_user, get_user_by_email, get_user_by_username
 from ...api.deps import get_current_active_user
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/register", response_model=UserSchema)
 def register(user: UserCreate, db: Session = Depends(get_db)):
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from typing import List
+from ...core.profiling import profile_store
+from ...models.user import User
+from ...schemas.profile import ProfileInfo
+from ...api.deps import get_current_active_user, require_profiling_token
+
+router = APIRouter(dependencies=[Depends(require_profiling_token)])
+
+@router.get("/", response_model=List[ProfileInfo])
+def list_profiles(current_user: User = Depends(get_current_active_user)):
+    return profile_store.list()
+
+@router.get("/{profile_id}")
+def download_profile(profile_id: str, current_user: User = Depends(get_current_active_user)):
+    path = profile_store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    # pstats format; open with `python -m pstats` or snakeviz
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
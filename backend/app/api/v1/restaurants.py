@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
-from ...core.database import get_db
+from ...core.database import get_db, get_read_db, pin_owner_to_primary, pin_restaurant_to_primary, route_reads_for_owner, route_reads_for_restaurant
+from ...core.etag import make_etag, etag_matches, set_cache_headers, not_modified
+from ...core.profiling import ProfiledRoute
 from ...models.user import User
 from ...models.restaurant import Restaurant
 from ...schemas.restaurant import RestaurantCreate, Restaurant as RestaurantSchema
 from ...api.deps import get_current_active_user
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/", response_model=RestaurantSchema)
 def create_restaurant(
@@ -22,30 +24,51 @@ def create_restaurant(
     db.add(db_restaurant)
     db.commit()
     db.refresh(db_restaurant)
+    
+    # Replicas may not have the new row yet; read it back from the primary
+    pin_restaurant_to_primary(db_restaurant.id)
+    pin_owner_to_primary(current_user.id)
     return db_restaurant
 
 @router.get("/", response_model=List[RestaurantSchema])
 def read_restaurants(
+    http_request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
+    route_reads_for_owner(db, current_user.id)
     restaurants = db.query(Restaurant).filter(
         Restaurant.owner_id == current_user.id
     ).offset(skip).limit(limit).all()
+    
+    # updated_at moves on every change, so it identifies each row's state
+    etag = make_etag("restaurants", skip, limit, [(r.id, r.created_at, r.updated_at) for r in restaurants])
+    if etag_matches(http_request, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
     return restaurants
 
 @router.get("/{restaurant_id}", response_model=RestaurantSchema)
 def read_restaurant(
     restaurant_id: int,
+    http_request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
+    route_reads_for_restaurant(db, restaurant_id)
     restaurant = db.query(Restaurant).filter(
         Restaurant.id == restaurant_id,
         Restaurant.owner_id == current_user.id
     ).first()
     if restaurant is None:
         raise HTTPException(status_code=404, detail="Restaurant not found")
+    
+    etag = make_etag("restaurant", restaurant.id, restaurant.created_at, restaurant.updated_at)
+    if etag_matches(http_request, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
     return restaurant
\ No newline at end of file
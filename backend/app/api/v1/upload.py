@@ -1,51 +1,68 @@
 import os
 import json
+import tarfile
+import zipfile
 from typing import Dict, Any, List
+import pandas as pd
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from ...core.database import get_db
+from ...core.database import get_db, pin_restaurant_to_primary
 from ...core.config import settings
+from ...core.profiling import ProfiledRoute
 from ...models.user import User
 from ...models.restaurant import Restaurant
-from ...schemas.sales import ColumnMapping, CSVUpload as CSVUploadSchema
-from ...services.sales import upload_csv
-from ...utils.csv_processor import get_csv_columns, save_uploaded_file
+from ...models.sales import CSVUpload
+from ...schemas.sales import ColumnMapping, CSVUpload as CSVUploadSchema, CSVBatchUploadResponse, CSVPreview
+from ...services.sales import create_csv_upload, process_csv_upload, upload_csv_batch
+from ...services.precompute import precomputer
+from ...utils.csv_processor import is_archive, extract_csv_members
+from ...utils.upload_store import is_csv, read_head, store_upload
+from ...utils.csv_preview import SAMPLE_BYTES, preview_csv_sample
 from ...api.deps import get_current_active_user
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
-@router.post("/preview-columns")
+@router.post("/preview-columns", response_model=CSVPreview)
 async def preview_columns(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user)
 ):
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="File must be a CSV")
+    if not is_csv(file.filename):
+        raise HTTPException(status_code=400, detail="File must be a CSV, optionally gzip or zstd compressed")
     
-    # Save file temporarily
-    temp_file_path = os.path.join(settings.UPLOAD_DIR, f"temp_{file.filename}")
-    file_content = await file.read()
-    save_uploaded_file(file_content, f"temp_{file.filename}", settings.UPLOAD_DIR)
+    # Only the head of the file is needed to sniff the dialect and sample values;
+    # clients send just that, so compressed uploads arrive cut mid-stream
+    try:
+        sample, truncated = await run_in_threadpool(read_head, file.file, SAMPLE_BYTES)
+    except (OSError, ValueError, EOFError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not decompress file: {str(e)}")
+    if not sample:
+        raise HTTPException(status_code=400, detail="File is empty")
     
     try:
-        # Get column names
-        columns = get_csv_columns(temp_file_path)
-        return {"columns": columns}
-    finally:
-        # Clean up temp file
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+        return preview_csv_sample(sample, truncated)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse CSV: {str(e)}")
+
+def _store_file(file: UploadFile) -> str:
+    # Stored under its content hash, so re-uploads never overwrite another
+    # upload's file and identical files share one copy
+    try:
+        return store_upload(file.file, settings.UPLOAD_DIR)
+    except (OSError, ValueError, EOFError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not store {file.filename}: {str(e)}")
 
 @router.post("/csv", response_model=CSVUploadSchema)
-async def upload_csv_file(
+def upload_csv_file(
     file: UploadFile = File(...),
     restaurant_id: int = Form(...),
     columns_mapping: str = Form(...),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="File must be a CSV")
+    if not is_csv(file.filename):
+        raise HTTPException(status_code=400, detail="File must be a CSV, optionally gzip or zstd compressed")
     
     # Check if restaurant belongs to current user
     restaurant = db.query(Restaurant).filter(
@@ -62,22 +79,125 @@ async def upload_csv_file(
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid columns mapping format")
     
-    # Save file
-    file_content = await file.read()
-    file_path = save_uploaded_file(file_content, file.filename, settings.UPLOAD_DIR)
+    # A plain def, so storing and ingesting run in the threadpool and live
+    # deltas are delivered while the upload is still in progress
+    file_path = _store_file(file)
     
-    # Process CSV
+    csv_upload = create_csv_upload(
+        db=db,
+        restaurant_id=restaurant_id,
+        file_path=file_path,
+        filename=file.filename,
+        columns_mapping=columns_mapping_dict
+    )
+    return _process_upload(db, csv_upload)
+
+def _process_upload(db: Session, csv_upload):
+    # Process CSV from its last checkpoint; the file is kept on failure so
+    # the upload can be resumed
     try:
-        csv_upload = upload_csv(
-            db=db,
-            restaurant_id=restaurant_id,
-            file_path=file_path,
-            filename=file.filename,
-            columns_mapping=columns_mapping_dict
+        csv_upload = process_csv_upload(db, csv_upload.id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing CSV upload {csv_upload.id}: {str(e)}"
         )
+    finally:
+        _after_ingest(csv_upload.restaurant_id)
+    return csv_upload
+
+def _after_ingest(restaurant_id: int):
+    pin_restaurant_to_primary(restaurant_id)
+    if settings.ANALYTICS_PRECOMPUTE_ON_UPLOAD:
+        precomputer.schedule(restaurant_id, delay=0)
+
+def _get_owned_upload(db: Session, upload_id: int, current_user: User):
+    csv_upload = db.query(CSVUpload).join(
+        Restaurant, Restaurant.id == CSVUpload.restaurant_id
+    ).filter(
+        CSVUpload.id == upload_id,
+        Restaurant.owner_id == current_user.id
+    ).first()
+    if not csv_upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return csv_upload
+
+@router.get("/{upload_id}", response_model=CSVUploadSchema)
+def read_upload(
+    upload_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    return _get_owned_upload(db, upload_id, current_user)
+
+@router.post("/{upload_id}/resume", response_model=CSVUploadSchema)
+def resume_upload(
+    upload_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    csv_upload = _get_owned_upload(db, upload_id, current_user)
+    if csv_upload.status == "completed":
         return csv_upload
-    except Exception as e:
-        # Clean up file if processing failed
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        raise HTTPException(status_code=500, detail=f"Error processing CSV: {str(e)}")
\ No newline at end of file
+    if not os.path.exists(csv_upload.file_path):
+        raise HTTPException(status_code=410, detail="Upload file is no longer available")
+    return _process_upload(db, csv_upload)
+
+@router.post("/csv/batch", response_model=CSVBatchUploadResponse)
+async def upload_csv_files(
+    files: List[UploadFile] = File(...),
+    restaurant_id: int = Form(...),
+    columns_mapping: str = Form(...),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    for file in files:
+        if not (is_csv(file.filename) or is_archive(file.filename)):
+            raise HTTPException(status_code=400, detail="Files must be CSVs (optionally gzip or zstd compressed) or zip/tar archives")
+    
+    # Check if restaurant belongs to current user
+    restaurant = db.query(Restaurant).filter(
+        Restaurant.id == restaurant_id,
+        Restaurant.owner_id == current_user.id
+    ).first()
+    
+    if not restaurant:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    
+    # Parse columns mapping
+    try:
+        columns_mapping_dict = json.loads(columns_mapping)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid columns mapping format")
+    
+    # Store files, expanding archives into their CSV members
+    csv_files = []
+    for file in files:
+        if not is_archive(file.filename):
+            csv_files.append((await run_in_threadpool(_store_file, file), file.filename))
+            continue
+        try:
+            csv_files.extend(await run_in_threadpool(extract_csv_members, file.file, file.filename, settings.UPLOAD_DIR))
+        except (zipfile.BadZipFile, tarfile.TarError):
+            raise HTTPException(status_code=400, detail=f"Invalid archive: {file.filename}")
+    
+    if not csv_files:
+        raise HTTPException(status_code=400, detail="No CSV files found in upload")
+    
+    # Parse across the process pool without blocking the event loop; files
+    # are kept on failure so their uploads can be resumed
+    try:
+        results = await run_in_threadpool(
+            upload_csv_batch,
+            db,
+            restaurant_id,
+            csv_files,
+            columns_mapping_dict,
+            settings.INGEST_WORKERS
+        )
+    finally:
+        _after_ingest(restaurant_id)
+    
+    return {"restaurant_id": restaurant_id, "files": results}
@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable
+from fastapi import HTTPException, status
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution; callers
+    that arrive while it runs wait for and share its result
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+class KeyedLimiter:
+    """
+    Cap the number of concurrent holders per key
+    """
+
+    def __init__(self, limit: int, name: str):
+        self.limit = limit
+        self.name = name
+        self._condition = threading.Condition()
+        self._active: Dict[Hashable, int] = {}
+
+    @contextmanager
+    def acquire(self, key: Hashable, timeout: float):
+        with self._condition:
+            acquired = self._condition.wait_for(
+                lambda: self._active.get(key, 0) < self.limit,
+                timeout=timeout
+            )
+            if not acquired:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Too many concurrent {self.name} requests",
+                    headers={"Retry-After": "1"},
+                )
+            self._active[key] = self._active.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active[key] -= 1
+                if not self._active[key]:
+                    del self._active[key]
+                self._condition.notify_all()
@@ -3,6 +3,9 @@ from typing import List, Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DATABASE_REPLICA_URLS: List[str] = []
+    DATABASE_REPLICA_RETRY_SECONDS: int = 30  # how long an unreachable replica is skipped
+    DATABASE_REPLICA_PIN_SECONDS: int = 30  # reads stay on the primary this long after a write, in the same worker process only; 0 disables
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
@@ -14,9 +17,39 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000"]
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # smaller responses are sent uncompressed
+    
+    PROFILING_TOKEN: Optional[str] = None  # requests sending it in X-Profile-Token are profiled
+    PROFILING_SAMPLE_RATE: float = 0.0  # share of all requests profiled at random
+    PROFILE_DIR: str = "./profiles"
+    PROFILE_MAX_STORED: int = 100  # oldest profiles are deleted beyond this
     
     UPLOAD_DIR: str = "./uploads"
     MAX_FILE_SIZE: int = 10485760  
+    INGEST_WORKERS: Optional[int] = None  # defaults to the CPU count
+    UPLOAD_CHUNK_BYTES: int = 8388608  # bytes of CSV committed per checkpoint
+    UPLOAD_LEASE_SECONDS: int = 300  # an upload with no checkpoint for this long is considered interrupted
+    
+    SALES_HOT_DAYS: int = 0  # whole months older than this move to sales_archive, 0 disables archiving
+    SALES_ARCHIVE_INTERVAL: int = 86400  # seconds between archive passes
+    
+    ANALYTICS_MAX_CONCURRENT_PER_USER: int = 4
+    ANALYTICS_MAX_CONCURRENT_PER_RESTAURANT: int = 2
+    ANALYTICS_LIMIT_TIMEOUT: float = 10.0  # seconds to wait for a free slot
+    
+    ANALYTICS_PRECOMPUTE_INTERVAL: int = 3600  # seconds between warm-up passes, 0 disables
+    ANALYTICS_PRECOMPUTE_ON_UPLOAD: bool = True
+    ANALYTICS_PRECOMPUTE_CONCURRENCY: int = 2
+    ANALYTICS_PRECOMPUTE_JITTER: int = 300  # max random delay in seconds per restaurant
+    ANALYTICS_PRECOMPUTE_RANGES: List[str] = ["7d", "30d", "90d", "1y"]  # dashboard date ranges
+    
+    LIVE_MAX_SUBSCRIBERS: int = 1000  # live dashboard connections per worker
+    LIVE_QUEUE_SIZE: int = 100  # undelivered deltas before a client is told to resync
+    LIVE_KEEPALIVE_SECONDS: int = 15
+    LIVE_TICKET_SECONDS: int = 60  # how long a stream ticket can be used to connect
+    
+    FORECAST_HISTORY_DAYS: int = 182  # days of sales the forecast models are fitted on
+    FORECAST_MAX_HORIZON_DAYS: int = 56
     
     class Config:
         env_file = ".env"
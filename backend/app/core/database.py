@@ -1,16 +1,176 @@
+import itertools
+import threading
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from typing import Any, Dict
 from .config import settings
 
 engine = create_engine(settings.DATABASE_URL)
+replica_engines = [create_engine(url, pool_pre_ping=True) for url in settings.DATABASE_REPLICA_URLS]
+
+_replica_cycle = itertools.cycle(range(len(replica_engines)))
+_replica_down_until = [0.0] * len(replica_engines)
+# ("restaurant" | "owner", id) -> monotonic time until which reads stay on the
+# primary. Pins live in this process only and expire after a fixed time, not
+# when the replica has caught up; other workers route as before.
+_primary_pins = {}
+_routing_lock = threading.Lock()
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the replica chosen for it and everything
+    else (flushes, DML, explicitly pinned sessions) to the primary. A read
+    that fails on the replica mid-request is retried on the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is None or self._flushing or isinstance(clause, UpdateBase):
+            if replica is not None:
+                self.info["wrote_primary"] = True
+            return engine
+        return replica
+
+    def execute(self, statement, *args, **kwargs):
+        replica = self.info.get("replica")
+        try:
+            return super().execute(statement, *args, **kwargs)
+        except OperationalError:
+            # Only reads are retried, and only while rolling back the failed
+            # transaction can't discard anything written to the primary
+            if replica is None or isinstance(statement, UpdateBase) or self.info.get("wrote_primary"):
+                raise
+            _mark_replica_down(replica_engines.index(replica))
+            self.rollback()
+            self.info.pop("replica", None)
+            return super().execute(statement, *args, **kwargs)
+
+    def commit(self):
+        super().commit()
+        self.info.pop("wrote_primary", None)
+
+    def rollback(self):
+        super().rollback()
+        self.info.pop("wrote_primary", None)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def _next_replica_index():
+    with _routing_lock:
+        now = time.monotonic()
+        for _ in range(len(replica_engines)):
+            index = next(_replica_cycle)
+            if _replica_down_until[index] <= now:
+                return index
+    return None
+
+def _mark_replica_down(index):
+    with _routing_lock:
+        _replica_down_until[index] = time.monotonic() + settings.DATABASE_REPLICA_RETRY_SECONDS
+
+def _pin_to_primary(key):
+    if replica_engines and settings.DATABASE_REPLICA_PIN_SECONDS > 0:
+        with _routing_lock:
+            _primary_pins[key] = time.monotonic() + settings.DATABASE_REPLICA_PIN_SECONDS
+
+def _route_reads(db: Session, key):
+    with _routing_lock:
+        pinned_until = _primary_pins.get(key)
+        if pinned_until is not None and pinned_until <= time.monotonic():
+            del _primary_pins[key]
+            pinned_until = None
+    if pinned_until is not None:
+        db.info.pop("replica", None)
+
+def pin_restaurant_to_primary(restaurant_id: int):
+    """
+    Keep a restaurant's reads on the primary long enough for replicas to
+    catch up with a write that was just committed
+    """
+    _pin_to_primary(("restaurant", restaurant_id))
+
+def route_reads_for_restaurant(db: Session, restaurant_id: int):
+    """
+    Move a read session onto the primary if the restaurant was written recently
+    """
+    _route_reads(db, ("restaurant", restaurant_id))
+
+def pin_owner_to_primary(owner_id: int):
+    """
+    Keep reads of a user's restaurant list on the primary after it changed
+    """
+    _pin_to_primary(("owner", owner_id))
+
+def route_reads_for_owner(db: Session, owner_id: int):
+    """
+    Move a read session onto the primary if the user's restaurants changed recently
+    """
+    _route_reads(db, ("owner", owner_id))
+
+def create_read_session() -> Session:
+    """
+    Open a session on a healthy replica, falling back to the primary when
+    there are none or none can be reached
+    """
+    db = ReadSessionLocal()
+    while True:
+        index = _next_replica_index()
+        if index is None:
+            db.info.pop("replica", None)
+            return db
+        db.info["replica"] = replica_engines[index]
+        try:
+            db.connection()
+            return db
+        except OperationalError:
+            _mark_replica_down(index)
+            db.close()
+            db = ReadSessionLocal()
+
+def save_on_primary(model, key: Dict[str, Any], values: Dict[str, Any]) -> None:
+    """
+    Insert or update the row of `model` identified by `key` in a primary
+    session. A read session may be on a lagging replica that doesn't show the
+    row yet, so it can't decide between insert and update.
+    """
+    db = SessionLocal()
+    
+    def save():
+        row = db.query(model).filter_by(**key).first()
+        if row is None:
+            row = model(**key)
+            db.add(row)
+        for name, value in values.items():
+            setattr(row, name, value)
+        db.commit()
+    
+    try:
+        try:
+            save()
+        except IntegrityError:
+            # Inserted concurrently by another worker; update that row instead
+            db.rollback()
+            save()
+    finally:
+        db.close()
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    db = create_read_session()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,245 @@
+import asyncio
+import cProfile
+import functools
+import hmac
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .config import settings
+
+PROFILE_HEADER = "x-profile-token"
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{13}-[0-9a-f]{8}$")
+
+class RequestProfile:
+    """
+    Timings, and optionally a cProfile profile, collected for one request
+    """
+
+    def __init__(self):
+        self.id = f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}"
+        self.started = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.accounted = 0.0  # seconds already attributed to some phase
+        self.handler_done: Optional[float] = None
+        self.profiler: Optional[cProfile.Profile] = None
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+            self.accounted += seconds
+
+    def server_timing(self, total: float) -> str:
+        timings = dict(self.timings)
+        if self.handler_done is not None:
+            timings["serialize"] = total - (self.handler_done - self.started)
+        timings["total"] = total
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+@contextmanager
+def phase(name: str):
+    """
+    Attribute the time spent in a block (or decorated function) to a
+    Server-Timing phase of the current profiled request. Time already
+    attributed to nested phases, such as SQL, is not counted twice.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    started, accounted = time.perf_counter(), profile.accounted
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        profile.record(name, elapsed - (profile.accounted - accounted))
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = conn.info.get("query_started")
+    if profile is not None and started:
+        profile.record("db", time.perf_counter() - started.pop())
+
+def _run_profiled(profile: RequestProfile, call: Callable[[], Any]) -> Any:
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is active on this thread; keep the timings only
+        return call()
+    try:
+        return call()
+    finally:
+        profiler.disable()
+        profile.profiler = profiler
+
+def _profiled_endpoint(endpoint: Callable) -> Callable:
+    # The endpoint runs in a worker thread for sync handlers, so cProfile has
+    # to be switched on there rather than in the middleware
+    if getattr(endpoint, "__profiled__", False):
+        # include_router rebuilds routes from their already wrapped endpoints
+        return endpoint
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            profile = _current_profile.get()
+            if profile is None:
+                return await endpoint(*args, **kwargs)
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                profiler = None
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                    profile.profiler = profiler
+                profile.handler_done = time.perf_counter()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            profile = _current_profile.get()
+            if profile is None:
+                return endpoint(*args, **kwargs)
+            try:
+                return _run_profiled(profile, lambda: endpoint(*args, **kwargs))
+            finally:
+                profile.handler_done = time.perf_counter()
+    wrapper.__profiled__ = True
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    """
+    Route whose endpoint is profiled when the request was selected for profiling
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _profiled_endpoint(endpoint), **kwargs)
+
+class ProfileStore:
+    """
+    Directory of the most recent `max_profiles` request profiles, each a
+    pstats dump plus a JSON description
+    """
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def save(self, profile: RequestProfile, info: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            if profile.profiler is not None:
+                profile.profiler.dump_stats(os.path.join(self.directory, f"{profile.id}.prof"))
+            with open(os.path.join(self.directory, f"{profile.id}.json"), "w") as f:
+                json.dump({"id": profile.id, "has_profile": profile.profiler is not None, **info}, f)
+            self._prune()
+
+    def _prune(self) -> None:
+        profile_ids = sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+        for profile_id in profile_ids[:max(len(profile_ids) - self.max_profiles, 0)]:
+            for extension in (".json", ".prof"):
+                path = os.path.join(self.directory, profile_id + extension)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # pruned or half-written
+        return profiles
+
+    def path(self, profile_id: str) -> Optional[str]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.prof")
+        return path if os.path.exists(path) else None
+
+profile_store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_STORED)
+
+def has_profiling_token(headers: Headers) -> bool:
+    token = headers.get(PROFILE_HEADER)
+    if not (settings.PROFILING_TOKEN and token):
+        return False
+    # Header values are latin-1; compare bytes, compare_digest rejects non-ASCII str
+    return hmac.compare_digest(token.encode("latin-1"), settings.PROFILING_TOKEN.encode())
+
+class ProfilingMiddleware:
+    """
+    Profile requests that carry the profiling token header, or a random
+    PROFILING_SAMPLE_RATE share of all requests. Profiled responses get a
+    Server-Timing breakdown and an X-Profile-Id naming the stored profile.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not (
+            has_profiling_token(Headers(scope=scope))
+            or random.random() < settings.PROFILING_SAMPLE_RATE
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(raw=message["headers"])
+                headers["Server-Timing"] = profile.server_timing(time.perf_counter() - profile.started)
+                headers["X-Profile-Id"] = profile.id
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+            # Only keep requests that reached a profiled endpoint, so browsing
+            # the store does not evict the profiles being looked for
+            if profile.handler_done is not None:
+                await run_in_threadpool(profile_store.save, profile, {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status_code": status_code,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "duration_ms": round((time.perf_counter() - profile.started) * 1000, 1),
+                    "timings": {name: round(seconds * 1000, 1) for name, seconds in profile.timings.items()}
+                })
@@ -48,4 +48,24 @@ def verify_token(token: str):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+def create_stream_ticket(username: str, restaurant_id: int) -> str:
+    # No "sub" claim, so a ticket is never accepted as an access token
+    expire = datetime.utcnow() + timedelta(seconds=settings.LIVE_TICKET_SECONDS)
+    to_encode = {"stream_user": username, "restaurant_id": restaurant_id, "exp": expire}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def verify_stream_ticket(ticket: str, restaurant_id: int) -> str:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired stream ticket",
+    )
+    try:
+        payload = jwt.decode(ticket, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    username = payload.get("stream_user")
+    if username is None or payload.get("restaurant_id") != restaurant_id:
+        raise credentials_exception
+    return username
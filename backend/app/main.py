@@ -1,16 +1,33 @@
+import threading
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from .core.database import get_db, engine
 from .core.config import settings
-from .models import user, restaurant, sales
-from .api.v1 import auth, restaurants, upload, analytics
+from .core.compression import CompressionMiddleware
+from .core.profiling import ProfilingMiddleware
+from .models import user, restaurant, sales, analytics as analytics_models
+from .api.v1 import auth, restaurants, upload, analytics, profiles
+from .utils.csv_processor import shutdown_ingest_pool
+from .services.archive import watch_sales_archive
+from .services.precompute import precomputer
+from .services.sales import watch_interrupted_uploads
 
 user.Base.metadata.create_all(bind=engine)
 restaurant.Base.metadata.create_all(bind=engine)
 sales.Base.metadata.create_all(bind=engine)
+analytics_models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Restaurant Analytics API", version="1.0.0")
+app = FastAPI(
+    title="Restaurant Analytics API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse
+)
+
+# Innermost, so Server-Timing leaves out compression
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,12 +35,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id"],
 )
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
 app.include_router(restaurants.router, prefix="/api/v1/restaurants", tags=["restaurants"])
 app.include_router(upload.router, prefix="/api/v1/upload", tags=["upload"])
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["analytics"])
+app.include_router(profiles.router, prefix="/api/v1/profiles", tags=["profiles"])
+
+@app.on_event("startup")
+def resume_uploads():
+    threading.Thread(target=watch_interrupted_uploads, name="resume-uploads", daemon=True).start()
+
+@app.on_event("startup")
+def start_sales_archive():
+    if settings.SALES_HOT_DAYS > 0:
+        threading.Thread(target=watch_sales_archive, name="sales-archive", daemon=True).start()
+
+@app.on_event("startup")
+def start_analytics_precompute():
+    if settings.ANALYTICS_PRECOMPUTE_INTERVAL > 0 or settings.ANALYTICS_PRECOMPUTE_ON_UPLOAD:
+        precomputer.start()
+
+@app.on_event("shutdown")
+def shutdown_ingest_workers():
+    shutdown_ingest_pool()
+    precomputer.stop()
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Text, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class PrecomputedAnalytics(Base):
+    __tablename__ = "precomputed_analytics"
+    __table_args__ = (UniqueConstraint("restaurant_id", "start_date", "end_date"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    start_date = Column(DateTime)
+    end_date = Column(DateTime)
+    data_version = Column(Integer, nullable=False)  # Restaurant.data_version the payload was computed at
+    payload = Column(Text, nullable=False)  # JSON AnalyticsResponse
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    restaurant = relationship("Restaurant")
+
+class SalesForecast(Base):
+    __tablename__ = "sales_forecasts"
+    __table_args__ = (UniqueConstraint("restaurant_id", "horizon_days"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    horizon_days = Column(Integer, nullable=False)
+    data_version = Column(Integer, nullable=False)  # Restaurant.data_version the payload was computed at
+    payload = Column(Text, nullable=False)  # JSON SalesForecast
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    restaurant = relationship("Restaurant")
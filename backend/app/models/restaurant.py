@@ -12,6 +12,7 @@ class Restaurant(Base):
     phone = Column(String)
     description = Column(Text)
     is_active = Column(Boolean, default=True)
+    data_version = Column(Integer, default=0, nullable=False)  # bumped on every sales ingest
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
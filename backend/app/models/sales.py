@@ -1,20 +1,45 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Float, Text
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, Date, DateTime, ForeignKey, Float, Text, LargeBinary, UniqueConstraint
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.database import Base
 
+class Item(Base):
+    __tablename__ = "sales_items"
+    __table_args__ = (UniqueConstraint("restaurant_id", "name"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    name = Column(String, nullable=False)
+
+class Category(Base):
+    __tablename__ = "sales_categories"
+    __table_args__ = (UniqueConstraint("restaurant_id", "name"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    name = Column(String, nullable=False)
+
+class PaymentMethod(Base):
+    __tablename__ = "sales_payment_methods"
+    __table_args__ = (UniqueConstraint("restaurant_id", "name"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    name = Column(String, nullable=False)
+
 class SalesData(Base):
     __tablename__ = "sales_data"
     
     id = Column(Integer, primary_key=True, index=True)
     transaction_id = Column(String, index=True)
     date = Column(DateTime, nullable=False)
-    item_name = Column(String, nullable=False)
-    category = Column(String)
+    item_id = Column(Integer, ForeignKey("sales_items.id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("sales_categories.id"))
     quantity = Column(Integer, default=1)
     price = Column(Float, nullable=False)
     total_amount = Column(Float, nullable=False)
-    payment_method = Column(String)
+    payment_method_id = Column(Integer, ForeignKey("sales_payment_methods.id"))
     customer_id = Column(String)
     staff_id = Column(String)
     notes = Column(Text)
@@ -22,6 +47,26 @@ class SalesData(Base):
     
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"))
     restaurant = relationship("Restaurant", back_populates="sales_data")
+    
+    # Dimension rows; the names are exposed read-only for the API schemas
+    item = relationship("Item")
+    category_ref = relationship("Category")
+    payment_method_ref = relationship("PaymentMethod")
+    item_name = association_proxy("item", "name")
+    category = association_proxy("category_ref", "name")
+    payment_method = association_proxy("payment_method_ref", "name")
+
+class SalesArchive(Base):
+    __tablename__ = "sales_archive"
+    __table_args__ = (UniqueConstraint("restaurant_id", "month"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    month = Column(Date, nullable=False)  # first day of the archived month
+    row_count = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)  # gzip CSV of the month's sales_data rows
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 class CSVUpload(Base):
     __tablename__ = "csv_uploads"
@@ -33,5 +78,25 @@ class CSVUpload(Base):
     processed = Column(Boolean, default=False)
     columns_mapping = Column(Text)  # JSON string of column mappings
     
+    # Ingestion progress; rows up to the checkpoint are committed
+    status = Column(String, default="pending", nullable=False)  # pending, processing, failed, completed
+    byte_offset = Column(BigInteger, default=0, nullable=False)
+    rows_processed = Column(Integer, default=0, nullable=False)
+    error = Column(Text)
+    lease_token = Column(String)  # identifies the worker currently processing the upload
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"))
-    restaurant = relationship("Restaurant")
\ No newline at end of file
+    restaurant = relationship("Restaurant")
+
+class DailySalesSketch(Base):
+    __tablename__ = "daily_sales_sketches"
+    __table_args__ = (UniqueConstraint("restaurant_id", "day"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    customers_hll = Column(LargeBinary)  # HyperLogLog registers
+    ticket_quantiles = Column(Text)  # JSON quantile sketch of ticket values
+    top_items = Column(Text)  # JSON Space-Saving summary keyed by item id
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
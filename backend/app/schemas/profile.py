@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Dict
+from datetime import datetime
+
+class ProfileInfo(BaseModel):
+    id: str
+    method: str
+    path: str
+    status_code: int
+    created_at: datetime
+    duration_ms: float
+    timings: Dict[str, float]
+    has_profile: bool
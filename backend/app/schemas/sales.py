@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+import ast
+import json
+from pydantic import BaseModel, validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, date
 
 class SalesDataBase(BaseModel):
     transaction_id: Optional[str] = None
@@ -39,10 +41,34 @@ class CSVUpload(BaseModel):
     processed: bool
     columns_mapping: Dict[str, Any]
     restaurant_id: int
+    status: str = "completed"
+    rows_processed: int = 0
+    error: Optional[str] = None
+    
+    @validator("columns_mapping", pre=True)
+    def parse_columns_mapping(cls, value):
+        if isinstance(value, str):
+            try:
+                return json.loads(value)
+            except json.JSONDecodeError:
+                # Uploads stored before the mapping was saved as JSON
+                return ast.literal_eval(value)
+        return value
     
     class Config:
         orm_mode = True
 
+class CSVUploadFileStatus(BaseModel):
+    filename: str
+    processed: bool
+    rows: int = 0
+    upload_id: Optional[int] = None
+    error: Optional[str] = None
+
+class CSVBatchUploadResponse(BaseModel):
+    restaurant_id: int
+    files: List[CSVUploadFileStatus]
+
 class ColumnMapping(BaseModel):
     date: str
     item_name: str
@@ -55,10 +81,32 @@ class ColumnMapping(BaseModel):
     staff_id: Optional[str] = None
     notes: Optional[str] = None
 
+class ColumnPreview(BaseModel):
+    name: str
+    inferred_type: str
+    sample_values: List[Any]
+
+class CSVPreview(BaseModel):
+    columns: List[str]
+    encoding: str
+    delimiter: str
+    quotechar: str
+    has_header: bool
+    sampled_rows: int
+    column_details: List[ColumnPreview]
+    suggested_mapping: Dict[str, Optional[str]]
+
 class AnalyticsRequest(BaseModel):
     restaurant_id: int
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
+    
+    @validator("start_date", "end_date", pre=True)
+    def parse_plain_dates(cls, value):
+        # The dashboard sends YYYY-MM-DD; treat it as midnight
+        if isinstance(value, str) and len(value) == 10:
+            return datetime.combine(date.fromisoformat(value), datetime.min.time())
+        return value
 
 class AnalyticsResponse(BaseModel):
     total_revenue: float
@@ -69,5 +117,31 @@ class AnalyticsResponse(BaseModel):
     sales_by_payment_method: Dict[str, float]
     sales_by_day_of_week: Dict[str, float]
     sales_by_hour: Dict[str, float]
+    unique_customers: int = 0
+    ticket_percentiles: Dict[str, float] = {}
+    heavy_hitter_items: List[Dict[str, Any]] = []
     anomalies: List[Dict[str, Any]]
-    insights: List[str]
\ No newline at end of file
+    insights: List[str]
+
+class LiveTicket(BaseModel):
+    ticket: str
+    expires_in: int  # seconds
+
+class ItemForecast(BaseModel):
+    item_name: str
+    quantities: List[float]  # one per forecast day
+    weekly_quantities: List[float]
+    total_quantity: float
+
+class HourlyRevenueForecast(BaseModel):
+    hour: datetime
+    revenue: float
+
+class SalesForecast(BaseModel):
+    restaurant_id: int
+    history_start: Optional[date] = None
+    history_end: Optional[date] = None
+    forecast_start: Optional[date] = None
+    horizon_days: int
+    items: List[ItemForecast] = []
+    revenue_by_hour: List[HourlyRevenueForecast] = []
@@ -0,0 +1,88 @@
+import json
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional
+from datetime import datetime
+from ..core.config import settings
+from ..core.concurrency import SingleFlight, KeyedLimiter
+from ..core.database import save_on_primary
+from ..models.analytics import PrecomputedAnalytics
+from ..models.restaurant import Restaurant
+from .sales import get_sales_analytics
+from .openai_service import detect_anomalies, generate_insights
+
+_analytics_flight = SingleFlight()
+_user_limiter = KeyedLimiter(settings.ANALYTICS_MAX_CONCURRENT_PER_USER, "analytics")
+_restaurant_limiter = KeyedLimiter(settings.ANALYTICS_MAX_CONCURRENT_PER_RESTAURANT, "restaurant analytics")
+
+def compute_analytics(db: Session, restaurant_id: int, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[str, Any]:
+    analytics_data = get_sales_analytics(
+        db=db,
+        restaurant_id=restaurant_id,
+        start_date=start_date,
+        end_date=end_date
+    )
+    
+    # Use OpenAI to detect anomalies
+    anomalies = detect_anomalies(analytics_data)
+    analytics_data["anomalies"] = anomalies
+    
+    # Use OpenAI to generate insights
+    insights = generate_insights(analytics_data)
+    analytics_data["insights"] = insights
+    
+    return analytics_data
+
+def _compute_limited(db: Session, restaurant_id: int, start_date: Optional[datetime], end_date: Optional[datetime]) -> Dict[str, Any]:
+    with _restaurant_limiter.acquire(restaurant_id, settings.ANALYTICS_LIMIT_TIMEOUT):
+        return compute_analytics(db, restaurant_id, start_date, end_date)
+
+def compute_analytics_shared(db: Session, restaurant_id: int, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Compute analytics, sharing one in-flight computation between concurrent
+    callers for the same restaurant and range
+    """
+    analytics_data = _analytics_flight.do(
+        (restaurant_id, start_date, end_date),
+        _compute_limited,
+        db,
+        restaurant_id,
+        start_date,
+        end_date
+    )
+    # Callers share the leader's result; give each its own top-level dict
+    return dict(analytics_data)
+
+def get_precomputed_analytics(db: Session, restaurant_id: int, start_date: Optional[datetime], end_date: Optional[datetime]) -> Optional[Dict[str, Any]]:
+    """
+    Return stored analytics for exactly this range if no sales were ingested
+    since they were computed
+    """
+    row = db.query(PrecomputedAnalytics.payload).join(
+        Restaurant, Restaurant.id == PrecomputedAnalytics.restaurant_id
+    ).filter(
+        PrecomputedAnalytics.restaurant_id == restaurant_id,
+        PrecomputedAnalytics.start_date == start_date,
+        PrecomputedAnalytics.end_date == end_date,
+        PrecomputedAnalytics.data_version == Restaurant.data_version
+    ).first()
+    return json.loads(row.payload) if row else None
+
+def store_precomputed_analytics(restaurant_id: int, start_date: Optional[datetime], end_date: Optional[datetime], data_version: int, analytics_data: Dict[str, Any]) -> None:
+    payload = json.dumps(analytics_data, default=lambda o: o.item() if hasattr(o, "item") else str(o))
+    save_on_primary(
+        PrecomputedAnalytics,
+        {"restaurant_id": restaurant_id, "start_date": start_date, "end_date": end_date},
+        {"data_version": data_version, "payload": payload}
+    )
+
+def get_analytics_coalesced(db: Session, user_id: int, restaurant_id: int, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Serve precomputed analytics when fresh, otherwise compute them under the
+    per-user limit, coalesced with concurrent identical requests
+    """
+    precomputed = get_precomputed_analytics(db, restaurant_id, start_date, end_date)
+    if precomputed is not None:
+        return precomputed
+    
+    with _user_limiter.acquire(user_id, settings.ANALYTICS_LIMIT_TIMEOUT):
+        return compute_analytics_shared(db, restaurant_id, start_date, end_date)
@@ -0,0 +1,184 @@
+import io
+import logging
+import time
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.restaurant import Restaurant
+from ..models.sales import SalesData, SalesArchive
+
+logger = logging.getLogger(__name__)
+
+# sales_data columns kept in the archive; everything a query can ask for
+ARCHIVE_COLUMNS = [
+    "transaction_id", "date", "item_id", "category_id", "quantity", "price",
+    "total_amount", "payment_method_id", "customer_id", "staff_id", "notes"
+]
+
+def _month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+def _compress_frame(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False, compression={"method": "gzip", "compresslevel": 9})
+    return buffer.getvalue()
+
+def _decompress_frame(payload: bytes, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    df = pd.read_csv(
+        io.BytesIO(payload),
+        compression="gzip",
+        usecols=columns,
+        parse_dates=["date"] if columns is None or "date" in columns else None,
+        dtype={"transaction_id": str, "customer_id": str, "staff_id": str, "notes": str}
+    )
+    for column in ("item_id", "category_id", "payment_method_id"):
+        if column in df.columns:
+            df[column] = df[column].astype("Int64")
+    return df
+
+def archive_cutoff(today: Optional[date] = None) -> date:
+    """
+    First day of the oldest month that stays hot
+    """
+    today = today or datetime.utcnow().date()
+    return _month_start(today - timedelta(days=settings.SALES_HOT_DAYS))
+
+def archive_restaurant_month(db: Session, restaurant_id: int, month: date) -> int:
+    """
+    Move one restaurant-month of sales_data into its archive row in a single
+    transaction; rows for a month that is already archived are merged in
+    """
+    # Serializes with ingestion, which updates the same restaurant row
+    db.query(Restaurant).filter(Restaurant.id == restaurant_id).with_for_update().first()
+
+    month_start = datetime.combine(month, datetime.min.time())
+    month_end = datetime.combine(_next_month(month), datetime.min.time())
+    hot_rows = db.query(SalesData).filter(
+        SalesData.restaurant_id == restaurant_id,
+        SalesData.date >= month_start,
+        SalesData.date < month_end
+    )
+    df = pd.DataFrame(
+        hot_rows.with_entities(*[getattr(SalesData, column) for column in ARCHIVE_COLUMNS]).all(),
+        columns=ARCHIVE_COLUMNS
+    )
+    if df.empty:
+        db.rollback()
+        return 0
+
+    archive = db.query(SalesArchive).filter(
+        SalesArchive.restaurant_id == restaurant_id,
+        SalesArchive.month == month
+    ).first()
+    if archive is None:
+        archive = SalesArchive(restaurant_id=restaurant_id, month=month)
+        db.add(archive)
+    else:
+        df = pd.concat([_decompress_frame(archive.payload), df], ignore_index=True)
+
+    df = df.sort_values("date", kind="stable")
+    archive.payload = _compress_frame(df)
+    archive.row_count = len(df)
+    moved = hot_rows.delete(synchronize_session=False)
+    db.commit()
+    return moved
+
+def archive_old_sales(db: Session) -> int:
+    """
+    Archive every restaurant-month of sales older than SALES_HOT_DAYS
+    """
+    if settings.SALES_HOT_DAYS <= 0:
+        return 0
+    cutoff = datetime.combine(archive_cutoff(), datetime.min.time())
+    months = db.query(
+        SalesData.restaurant_id,
+        func.min(SalesData.date)
+    ).filter(SalesData.date < cutoff).group_by(SalesData.restaurant_id).all()
+
+    moved = 0
+    for restaurant_id, oldest in months:
+        month = _month_start(oldest)
+        while month < cutoff.date():
+            moved += archive_restaurant_month(db, restaurant_id, month)
+            month = _next_month(month)
+    return moved
+
+def watch_sales_archive():
+    """
+    Run archive passes forever; started with the app when archiving is enabled
+    """
+    while True:
+        db = SessionLocal()
+        try:
+            moved = archive_old_sales(db)
+            if moved:
+                logger.info("Archived %s sales rows", moved)
+        except Exception:
+            logger.exception("Failed to archive old sales")
+            db.rollback()
+        finally:
+            db.close()
+        time.sleep(settings.SALES_ARCHIVE_INTERVAL)
+
+def load_archived_sales(db: Session, restaurant_id: int, columns: List[str], start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Read archived rows for a restaurant and date range, with the same columns
+    and filter semantics as a query on sales_data
+    """
+    query = db.query(SalesArchive.payload).filter(SalesArchive.restaurant_id == restaurant_id)
+    if start_date:
+        query = query.filter(SalesArchive.month >= _month_start(start_date))
+    if end_date:
+        query = query.filter(SalesArchive.month <= _month_start(end_date))
+
+    usecols = list(dict.fromkeys(columns + ["date"]))
+    frames = []
+    for (payload,) in query:
+        df = _decompress_frame(payload, usecols)
+        if start_date:
+            df = df[df["date"] >= start_date]
+        if end_date:
+            df = df[df["date"] <= end_date]
+        frames.append(df[columns])
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+def latest_archived_sale(db: Session, restaurant_id: int) -> Optional[datetime]:
+    archive = db.query(SalesArchive).filter(
+        SalesArchive.restaurant_id == restaurant_id
+    ).order_by(SalesArchive.month.desc()).first()
+    if archive is None:
+        return None
+    return _decompress_frame(archive.payload, ["date"])["date"].max().to_pydatetime()
+
+def load_sales_frame(db: Session, restaurant_id: int, columns: List[str], start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Sales rows for a restaurant and date range across the hot table and the
+    archive
+    """
+    query = db.query(*[getattr(SalesData, column) for column in columns]).filter(
+        SalesData.restaurant_id == restaurant_id
+    )
+    if start_date:
+        query = query.filter(SalesData.date >= start_date)
+    if end_date:
+        query = query.filter(SalesData.date <= end_date)
+    hot = pd.DataFrame(query.all(), columns=columns)
+
+    # Which months are archived depends on the horizon in force when each
+    # pass ran, so ask the archive; its (restaurant_id, month) index keeps a
+    # range with nothing archived to a single lookup
+    cold = load_archived_sales(db, restaurant_id, columns, start_date, end_date)
+    if cold.empty:
+        return hot
+    if hot.empty:
+        return cold
+    return pd.concat([cold, hot], ignore_index=True)
@@ -0,0 +1,93 @@
+import threading
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..models.sales import Item, Category, PaymentMethod
+from ..schemas.sales import SalesDataCreate
+
+# Sales field -> dimension model holding its values
+DIMENSIONS = {
+    "item_name": Item,
+    "category": Category,
+    "payment_method": PaymentMethod,
+}
+
+# (table, restaurant_id) -> {name: id}. Dimension rows are never renamed or
+# deleted, so entries stay valid for the life of the process. Ids resolved
+# inside a transaction are kept on the session until it commits.
+_id_cache: Dict[Tuple[str, int], Dict[str, int]] = {}
+_cache_lock = threading.Lock()
+_PENDING_KEY = "pending_dimension_ids"
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_ids(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        with _cache_lock:
+            for key, ids in pending.items():
+                _id_cache.setdefault(key, {}).update(ids)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_ids(session):
+    session.info.pop(_PENDING_KEY, None)
+
+def _load_ids(db: Session, model, restaurant_id: int, names: Iterable[str]) -> Dict[str, int]:
+    names = list(names)
+    found = {}
+    for i in range(0, len(names), 500):
+        rows = db.query(model.name, model.id).filter(
+            model.restaurant_id == restaurant_id,
+            model.name.in_(names[i:i + 500])
+        ).all()
+        found.update(rows)
+    return found
+
+def resolve_ids(db: Session, model, restaurant_id: int, names: Iterable[str]) -> Dict[str, int]:
+    """
+    Map dimension names to ids for a restaurant, creating missing rows in bulk
+    """
+    key = (model.__tablename__, restaurant_id)
+    pending = db.info.setdefault(_PENDING_KEY, {}).setdefault(key, {})
+    with _cache_lock:
+        cached = dict(_id_cache.get(key, {}))
+    cached.update(pending)
+    missing = {name for name in names if name not in cached}
+
+    if missing:
+        found = _load_ids(db, model, restaurant_id, missing)
+        new_names = missing - set(found)
+        if new_names:
+            try:
+                with db.begin_nested():
+                    db.bulk_insert_mappings(model, [
+                        {"restaurant_id": restaurant_id, "name": name} for name in new_names
+                    ])
+            except IntegrityError:
+                # Another upload created some of them concurrently; re-read below
+                pass
+            found.update(_load_ids(db, model, restaurant_id, new_names))
+        pending.update(found)
+        cached.update(found)
+
+    return cached
+
+def resolve_sales_dimensions(db: Session, sales_data_list: List[SalesDataCreate]) -> Dict[Tuple[str, int], Dict[str, int]]:
+    """
+    Resolve every dimension name in a batch, one round trip per dimension and restaurant
+    """
+    wanted: Dict[Tuple[str, int], set] = {}
+    for sales_data in sales_data_list:
+        for field in DIMENSIONS:
+            value = getattr(sales_data, field)
+            if value is not None:
+                wanted.setdefault((field, sales_data.restaurant_id), set()).add(value)
+
+    return {
+        (field, restaurant_id): resolve_ids(db, DIMENSIONS[field], restaurant_id, names)
+        for (field, restaurant_id), names in wanted.items()
+    }
+
+def get_dimension_names(db: Session, model, restaurant_id: int) -> Dict[int, str]:
+    rows = db.query(model.id, model.name).filter(model.restaurant_id == restaurant_id).all()
+    return dict(rows)
@@ -0,0 +1,129 @@
+import json
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional
+from datetime import datetime, timedelta
+from ..core.concurrency import SingleFlight
+from ..core.config import settings
+from ..core.database import save_on_primary
+from ..core.profiling import phase
+from ..models.analytics import SalesForecast
+from ..models.restaurant import Restaurant
+from ..models.sales import SalesData, Item
+from ..utils.forecasting import holt_winters_batch
+from .archive import latest_archived_sale, load_sales_frame
+from .dimensions import get_dimension_names
+
+DAYS_PER_WEEK = 7
+HOURS_PER_DAY = 24
+
+_forecast_flight = SingleFlight()
+
+def _latest_sale(db: Session, restaurant_id: int) -> Optional[datetime]:
+    latest = db.query(func.max(SalesData.date)).filter(SalesData.restaurant_id == restaurant_id).scalar()
+    archived = latest_archived_sale(db, restaurant_id)
+    candidates = [value for value in (latest, archived) if value is not None]
+    return pd.Timestamp(max(candidates)).to_pydatetime() if candidates else None
+
+@phase("compute")
+def _fit_forecast(df: pd.DataFrame, history_start: datetime, horizon_days: int):
+    days = (df["date"].dt.normalize() - history_start).dt.days.to_numpy()
+    n_days = int(days.max()) + 1
+    item_codes, item_ids = pd.factorize(df["item_id"])
+
+    # (item, day) quantities and (hour of day, day) revenue; every series is
+    # fitted at once with a weekly season
+    quantities = np.zeros((len(item_ids), n_days))
+    np.add.at(quantities, (item_codes, days), df["quantity"].to_numpy(dtype=np.float64))
+    revenue = np.zeros((HOURS_PER_DAY, n_days))
+    np.add.at(revenue, (df["date"].dt.hour.to_numpy(), days), df["total_amount"].to_numpy(dtype=np.float64))
+
+    item_forecast = holt_winters_batch(quantities, DAYS_PER_WEEK, horizon_days)
+    revenue_forecast = holt_winters_batch(revenue, DAYS_PER_WEEK, horizon_days)
+    return item_ids, item_forecast, revenue_forecast, n_days
+
+def compute_sales_forecast(db: Session, restaurant_id: int, horizon_days: int) -> Dict[str, Any]:
+    """
+    Forecast daily quantities per item and revenue per hour for the
+    `horizon_days` after the restaurant's last recorded sale
+    """
+    forecast = {"restaurant_id": restaurant_id, "horizon_days": horizon_days, "items": [], "revenue_by_hour": []}
+    latest = _latest_sale(db, restaurant_id)
+    if latest is None:
+        return forecast
+
+    history_end = pd.Timestamp(latest).normalize()
+    history_start = history_end - timedelta(days=settings.FORECAST_HISTORY_DAYS - 1)
+    df = load_sales_frame(
+        db, restaurant_id,
+        ["date", "item_id", "quantity", "total_amount"],
+        start_date=history_start.to_pydatetime()
+    )
+    df = df.dropna(subset=["item_id"])
+    if df.empty:
+        return forecast
+    df["date"] = pd.to_datetime(df["date"])
+
+    # Don't treat the days before the first sale as days without sales
+    history_start = df["date"].min().normalize()
+    item_ids, item_forecast, revenue_forecast, n_days = _fit_forecast(df, history_start, horizon_days)
+    forecast_start = history_start + timedelta(days=n_days)
+
+    item_names = get_dimension_names(db, Item, restaurant_id)
+    week_starts = np.arange(0, horizon_days, DAYS_PER_WEEK)
+    weekly = np.add.reduceat(item_forecast, week_starts, axis=1)
+    totals = item_forecast.sum(axis=1)
+    forecast.update(
+        history_start=history_start.date(),
+        history_end=history_end.date(),
+        forecast_start=forecast_start.date(),
+        items=[
+            {
+                "item_name": item_names[int(item_ids[index])],
+                "quantities": np.round(item_forecast[index], 2).tolist(),
+                "weekly_quantities": np.round(weekly[index], 2).tolist(),
+                "total_quantity": round(float(totals[index]), 2)
+            }
+            for index in np.argsort(-totals, kind="stable")
+        ],
+        revenue_by_hour=[
+            {
+                "hour": (forecast_start + timedelta(days=day, hours=hour)).to_pydatetime(),
+                "revenue": round(float(revenue_forecast[hour, day]), 2)
+            }
+            for day in range(horizon_days)
+            for hour in range(HOURS_PER_DAY)
+        ]
+    )
+    return forecast
+
+def get_sales_forecast(db: Session, restaurant_id: int, horizon_days: int) -> Dict[str, Any]:
+    """
+    Serve the stored forecast while no sales were ingested since it was made,
+    otherwise compute and store a new one
+    """
+    row = db.query(SalesForecast.payload).join(
+        Restaurant, Restaurant.id == SalesForecast.restaurant_id
+    ).filter(
+        SalesForecast.restaurant_id == restaurant_id,
+        SalesForecast.horizon_days == horizon_days,
+        SalesForecast.data_version == Restaurant.data_version
+    ).first()
+    if row is not None:
+        return json.loads(row.payload)
+    return _forecast_flight.do((restaurant_id, horizon_days), _compute_and_store, db, restaurant_id, horizon_days)
+
+def _compute_and_store(db: Session, restaurant_id: int, horizon_days: int) -> Dict[str, Any]:
+    data_version = db.query(Restaurant.data_version).filter(Restaurant.id == restaurant_id).scalar()
+    forecast = compute_sales_forecast(db, restaurant_id, horizon_days)
+
+    # Dates in ISO 8601, as the API returns them
+    payload = json.dumps(forecast, default=lambda o: o.isoformat())
+    save_on_primary(
+        SalesForecast,
+        {"restaurant_id": restaurant_id, "horizon_days": horizon_days},
+        {"data_version": data_version, "payload": payload}
+    )
+    return json.loads(payload)
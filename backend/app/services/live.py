@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import threading
+import orjson
+import pandas as pd
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime
+from ..core.config import settings
+from ..schemas.sales import SalesDataCreate
+
+# (start_date, end_date) a subscriber's dashboard covers; None is open-ended
+RangeKey = Tuple[Optional[datetime], Optional[datetime]]
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "pending_live_sales"
+KEEPALIVE = b": keepalive\n\n"
+RESYNC = b"event: resync\ndata: {}\n\n"
+
+def sse_event(name: str, data) -> bytes:
+    return b"event: " + name.encode() + b"\ndata: " + orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS) + b"\n\n"
+
+class LiveSalesBroker:
+    """
+    Per-restaurant fan-out of sales aggregate deltas to the dashboards
+    connected to this worker. Each delta is aggregated and serialized once per
+    distinct date range being watched, however many dashboards share it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Dict[RangeKey, Set[asyncio.Queue]]] = {}
+        self._count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, restaurant_id: int, range_key: RangeKey) -> Optional[asyncio.Queue]:
+        """
+        Register a subscriber from the event loop; None when the worker is full
+        """
+        queue = asyncio.Queue(maxsize=settings.LIVE_QUEUE_SIZE)
+        with self._lock:
+            if self._count >= settings.LIVE_MAX_SUBSCRIBERS:
+                return None
+            self._loop = asyncio.get_event_loop()
+            self._subscribers.setdefault(restaurant_id, {}).setdefault(range_key, set()).add(queue)
+            self._count += 1
+        return queue
+
+    def unsubscribe(self, restaurant_id: int, range_key: RangeKey, queue: asyncio.Queue) -> None:
+        with self._lock:
+            ranges = self._subscribers.get(restaurant_id, {})
+            queues = ranges.get(range_key)
+            if queues is None or queue not in queues:
+                return
+            queues.discard(queue)
+            self._count -= 1
+            if not queues:
+                del ranges[range_key]
+            if not ranges:
+                self._subscribers.pop(restaurant_id, None)
+
+    def has_subscribers(self, restaurant_ids: Iterable[int]) -> bool:
+        with self._lock:
+            return any(restaurant_id in self._subscribers for restaurant_id in restaurant_ids)
+
+    def watched_ranges(self, restaurant_id: int) -> List[RangeKey]:
+        with self._lock:
+            return list(self._subscribers.get(restaurant_id, ()))
+
+    def publish(self, restaurant_id: int, range_key: RangeKey, message: bytes) -> None:
+        """
+        Queue a message for every subscriber of a range; safe from any thread
+        """
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, restaurant_id, range_key, message)
+
+    def _deliver(self, restaurant_id: int, range_key: RangeKey, message: bytes) -> None:
+        with self._lock:
+            queues = list(self._subscribers.get(restaurant_id, {}).get(range_key, ()))
+        for queue in queues:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A slow client has missed deltas; tell it to refetch instead
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+live_sales = LiveSalesBroker()
+
+def sales_delta(df: pd.DataFrame) -> Dict:
+    """
+    Increments to the get_sales_analytics aggregates for a set of new rows
+    """
+    return {
+        "total_revenue": float(df["total_amount"].sum()),
+        "total_transactions": len(df),
+        "sales_by_category": df.groupby("category")["total_amount"].sum().to_dict(),
+        "sales_by_payment_method": df.groupby("payment_method")["total_amount"].sum().to_dict(),
+        "sales_by_day_of_week": df.groupby(df["date"].dt.day_name())["total_amount"].sum().to_dict(),
+        "sales_by_hour": df.groupby(df["date"].dt.hour)["total_amount"].sum().to_dict(),
+        "item_quantities": df.groupby("item_name")["quantity"].sum().to_dict(),
+    }
+
+def publish_sales(sales_data_list: Iterable[SalesDataCreate]) -> None:
+    """
+    Push aggregate deltas for committed rows to the restaurants' live dashboards
+    """
+    sales_data_list = list(sales_data_list)
+    if not live_sales.has_subscribers({sales_data.restaurant_id for sales_data in sales_data_list}):
+        return
+    df = pd.DataFrame([
+        {
+            "restaurant_id": sales_data.restaurant_id,
+            "date": sales_data.date,
+            "item_name": sales_data.item_name,
+            "category": sales_data.category,
+            "payment_method": sales_data.payment_method,
+            "quantity": sales_data.quantity,
+            "total_amount": sales_data.total_amount,
+        }
+        for sales_data in sales_data_list
+    ])
+    if df.empty:
+        return
+    df["date"] = pd.to_datetime(df["date"])
+
+    for restaurant_id, rows in df.groupby("restaurant_id"):
+        for range_key in live_sales.watched_ranges(int(restaurant_id)):
+            start_date, end_date = range_key
+            in_range = rows
+            if start_date:
+                in_range = in_range[in_range["date"] >= start_date]
+            if end_date:
+                in_range = in_range[in_range["date"] <= end_date]
+            if not in_range.empty:
+                message = sse_event("sales", {"restaurant_id": int(restaurant_id), **sales_delta(in_range)})
+                live_sales.publish(int(restaurant_id), range_key, message)
+
+def stage_live_sales(db: Session, sales_data_list: List[SalesDataCreate]) -> None:
+    """
+    Remember rows written in this transaction; they are pushed once it commits
+    """
+    db.info.setdefault(_PENDING_KEY, []).extend(sales_data_list)
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_sales(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        try:
+            publish_sales(pending)
+        except Exception:
+            # The rows are committed; a lost delta must not fail the ingest
+            logger.exception("Failed to publish live sales deltas")
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_sales(session):
+    session.info.pop(_PENDING_KEY, None)
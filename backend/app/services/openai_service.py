@@ -2,9 +2,11 @@ import openai
 import json
 from typing import List, Dict, Any
 from ..core.config import settings
+from ..core.profiling import phase
 
 openai.api_key = settings.OPENAI_API_KEY
 
+@phase("llm")
 def detect_anomalies(sales_data: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Use OpenAI to detect anomalies in sales data
@@ -66,6 +68,7 @@ def detect_anomalies(sales_data: Dict[str, Any]) -> List[Dict[str, Any]]:
             "explanation": "AI service error"
         }]
 
+@phase("llm")
 def generate_insights(sales_data: Dict[str, Any]) -> List[str]:
     """
     Use OpenAI to generate insights from sales data
@@ -0,0 +1,161 @@
+import heapq
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from ..core.config import settings
+from ..core.database import SessionLocal, create_read_session, route_reads_for_restaurant
+from ..models.analytics import PrecomputedAnalytics
+from ..models.restaurant import Restaurant
+from .analytics import compute_analytics_shared, get_precomputed_analytics, store_precomputed_analytics
+
+logger = logging.getLogger(__name__)
+
+def dashboard_range(range_key: str, today: date) -> Tuple[datetime, datetime]:
+    """
+    Translate a dashboard range such as "30d" or "1y" into the start/end the
+    frontend sends for it (UTC midnights)
+    """
+    end_date = datetime.combine(today, datetime.min.time())
+    amount, unit = int(range_key[:-1]), range_key[-1]
+    if unit == "d":
+        return end_date - timedelta(days=amount), end_date
+    if unit == "y":
+        try:
+            return end_date.replace(year=end_date.year - amount), end_date
+        except ValueError:
+            # 29 February
+            return end_date.replace(year=end_date.year - amount, day=28), end_date
+    raise ValueError(f"Unsupported analytics range: {range_key}")
+
+def warm_restaurant_analytics(restaurant_id: int) -> None:
+    """
+    Compute and store analytics for every dashboard range that is missing or
+    stale for a restaurant
+    """
+    db = create_read_session()
+    route_reads_for_restaurant(db, restaurant_id)
+    try:
+        restaurant = db.query(Restaurant).filter(
+            Restaurant.id == restaurant_id,
+            Restaurant.is_active == True
+        ).first()
+        if restaurant is None:
+            return
+
+        today = datetime.utcnow().date()
+        data_version = restaurant.data_version
+        for range_key in settings.ANALYTICS_PRECOMPUTE_RANGES:
+            start_date, end_date = dashboard_range(range_key, today)
+            if get_precomputed_analytics(db, restaurant_id, start_date, end_date) is not None:
+                continue
+            analytics_data = compute_analytics_shared(db, restaurant_id, start_date, end_date)
+            store_precomputed_analytics(restaurant_id, start_date, end_date, data_version, analytics_data)
+
+        # Every range ends today, so anything else belongs to a previous day
+        db.query(PrecomputedAnalytics).filter(
+            PrecomputedAnalytics.restaurant_id == restaurant_id,
+            PrecomputedAnalytics.end_date != datetime.combine(today, datetime.min.time())
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        logger.exception("Failed to precompute analytics for restaurant %s", restaurant_id)
+        db.rollback()
+    finally:
+        db.close()
+
+class AnalyticsPrecomputer:
+    """
+    In-process scheduler that warms analytics for active restaurants on a
+    fixed cadence and after uploads. Passes are spread out with random jitter
+    and at most ANALYTICS_PRECOMPUTE_CONCURRENCY restaurants run at once.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._queue: List[Tuple[float, int]] = []
+        self._queued: Dict[int, float] = {}  # restaurant id -> earliest pending run
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.ANALYTICS_PRECOMPUTE_CONCURRENCY,
+            thread_name_prefix="analytics-precompute"
+        )
+        self._thread = threading.Thread(target=self._run, name="analytics-precompute-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._thread = None
+        self._executor = None
+
+    def schedule(self, restaurant_id: int, delay: Optional[float] = None) -> None:
+        if delay is None:
+            delay = random.uniform(0, settings.ANALYTICS_PRECOMPUTE_JITTER)
+        run_at = time.monotonic() + delay
+        with self._condition:
+            if self._queued.get(restaurant_id, math.inf) <= run_at:
+                return
+            self._queued[restaurant_id] = run_at
+            heapq.heappush(self._queue, (run_at, restaurant_id))
+            self._condition.notify_all()
+
+    def schedule_all(self) -> None:
+        db = SessionLocal()
+        try:
+            restaurant_ids = [
+                restaurant_id for (restaurant_id,) in
+                db.query(Restaurant.id).filter(Restaurant.is_active == True)
+            ]
+        finally:
+            db.close()
+        for restaurant_id in restaurant_ids:
+            self.schedule(restaurant_id)
+
+    def _run(self) -> None:
+        interval = settings.ANALYTICS_PRECOMPUTE_INTERVAL
+        next_pass = time.monotonic() if interval > 0 else math.inf
+        while True:
+            with self._condition:
+                if self._stopping:
+                    return
+                now = time.monotonic()
+                due = []
+                while self._queue and self._queue[0][0] <= now:
+                    run_at, restaurant_id = heapq.heappop(self._queue)
+                    # Skip entries superseded by an earlier reschedule
+                    if self._queued.get(restaurant_id) == run_at:
+                        del self._queued[restaurant_id]
+                        due.append(restaurant_id)
+                pass_due = now >= next_pass
+                if not due and not pass_due:
+                    wake_at = min(self._queue[0][0] if self._queue else math.inf, next_pass)
+                    self._condition.wait(None if wake_at == math.inf else wake_at - now)
+                    continue
+
+            if pass_due:
+                next_pass = now + interval
+                try:
+                    self.schedule_all()
+                except Exception:
+                    logger.exception("Failed to schedule analytics precomputation")
+            for restaurant_id in due:
+                self._executor.submit(warm_restaurant_analytics, restaurant_id)
+
+precomputer = AnalyticsPrecomputer()
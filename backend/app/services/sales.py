@@ -1,73 +1,286 @@
+import json
+import logging
+import time
+import uuid
 import pandas as pd
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
-from datetime import datetime
-from ..models.sales import SalesData, CSVUpload
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.profiling import phase
+from ..models.restaurant import Restaurant
+from ..models.sales import SalesData, CSVUpload, Item, Category, PaymentMethod
 from ..schemas.sales import SalesDataCreate, ColumnMapping
-from ..utils.csv_processor import process_csv_file
+from ..utils.csv_processor import iter_csv_chunks, parse_csv_files_parallel
 from ..utils.data_validator import validate_sales_data
+from .archive import load_sales_frame
+from .live import stage_live_sales
+from .dimensions import DIMENSIONS, resolve_sales_dimensions, get_dimension_names
+from .sketches import update_daily_sketches, summarize_sketches
+
+logger = logging.getLogger(__name__)
 
 def get_sales_data(db: Session, restaurant_id: int, skip: int = 0, limit: int = 100):
-    return db.query(SalesData).filter(
+    return db.query(SalesData).options(
+        selectinload(SalesData.item),
+        selectinload(SalesData.category_ref),
+        selectinload(SalesData.payment_method_ref)
+    ).filter(
         SalesData.restaurant_id == restaurant_id
     ).offset(skip).limit(limit).all()
 
+def _build_sales_row(sales_data: SalesDataCreate, dimension_ids: Dict[Any, Dict[str, int]]) -> SalesData:
+    values = sales_data.dict(exclude=set(DIMENSIONS))
+    for field, id_column in (("item_name", "item_id"), ("category", "category_id"), ("payment_method", "payment_method_id")):
+        name = getattr(sales_data, field)
+        values[id_column] = dimension_ids[(field, sales_data.restaurant_id)][name] if name is not None else None
+    return SalesData(**values)
+
+def bump_data_versions(db: Session, restaurant_ids):
+    if restaurant_ids:
+        db.query(Restaurant).filter(Restaurant.id.in_(restaurant_ids)).update(
+            {Restaurant.data_version: Restaurant.data_version + 1},
+            synchronize_session=False
+        )
+
 def create_sales_data(db: Session, sales_data: SalesDataCreate):
-    db_sales_data = SalesData(**sales_data.dict())
-    db.add(db_sales_data)
-    db.commit()
+    db_sales_data = create_sales_data_batch(db, [sales_data])[0]
     db.refresh(db_sales_data)
     return db_sales_data
 
-def create_sales_data_batch(db: Session, sales_data_list: List[SalesDataCreate]):
-    db_sales_data_list = [SalesData(**sales_data.dict()) for sales_data in sales_data_list]
+def create_sales_data_batch(db: Session, sales_data_list: List[SalesDataCreate], commit: bool = True):
+    # Bumping first locks the restaurant rows until commit, which serializes
+    # concurrent ingests before they read and insert daily sketch rows
+    bump_data_versions(db, {sales_data.restaurant_id for sales_data in sales_data_list})
+    dimension_ids = resolve_sales_dimensions(db, sales_data_list)
+    db_sales_data_list = [_build_sales_row(sales_data, dimension_ids) for sales_data in sales_data_list]
     db.add_all(db_sales_data_list)
-    db.commit()
+    update_daily_sketches(db, db_sales_data_list)
+    stage_live_sales(db, sales_data_list)
+    if commit:
+        db.commit()
     return db_sales_data_list
 
-def upload_csv(db: Session, restaurant_id: int, file_path: str, filename: str, columns_mapping: Dict[str, Any]):
-    # Create CSV upload record
+def create_csv_upload(db: Session, restaurant_id: int, file_path: str, filename: str, columns_mapping: Dict[str, Any]):
     db_csv_upload = CSVUpload(
         filename=filename,
         file_path=file_path,
-        columns_mapping=str(columns_mapping),
-        restaurant_id=restaurant_id
+        columns_mapping=json.dumps(columns_mapping),
+        restaurant_id=restaurant_id,
+        status="pending"
     )
     db.add(db_csv_upload)
     db.commit()
     db.refresh(db_csv_upload)
+    return db_csv_upload
+
+def claim_csv_upload(db: Session, upload_id: int) -> Optional[str]:
+    """
+    Take the processing lease on an upload that is pending, failed, or whose
+    worker stopped checkpointing. Returns the lease token, or None if the
+    upload is complete or actively being processed.
+    """
+    lease_token = uuid.uuid4().hex
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.UPLOAD_LEASE_SECONDS)
+    claimed = db.query(CSVUpload).filter(
+        CSVUpload.id == upload_id,
+        CSVUpload.status != "completed",
+        or_(CSVUpload.status != "processing", CSVUpload.updated_at < stale_before)
+    ).update({
+        CSVUpload.status: "processing",
+        CSVUpload.lease_token: lease_token,
+        CSVUpload.error: None,
+        CSVUpload.updated_at: func.now()
+    }, synchronize_session=False)
+    db.commit()
+    return lease_token if claimed else None
+
+def _fail_csv_upload(db: Session, upload_id: int, lease_token: str, error: Exception):
+    db.query(CSVUpload).filter(
+        CSVUpload.id == upload_id,
+        CSVUpload.lease_token == lease_token
+    ).update({
+        CSVUpload.status: "failed",
+        CSVUpload.error: str(error),
+        CSVUpload.lease_token: None
+    }, synchronize_session=False)
+    db.commit()
+
+def process_csv_upload(
+    db: Session,
+    upload_id: int,
+    lease_token: Optional[str] = None,
+    chunks: Optional[Iterable[Tuple[List[SalesDataCreate], int, int]]] = None
+):
+    """
+    Ingest an upload from its last checkpoint. Each chunk of rows commits
+    together with the new byte offset and row count, so a retry after a
+    failure or restart continues where the last commit left off without
+    inserting any row twice. `chunks` are validated (sales_data_list,
+    byte_offset, rows_processed) already parsed from the file, e.g. in the
+    ingest pool; by default the file is parsed here.
+    """
+    if lease_token is None:
+        lease_token = claim_csv_upload(db, upload_id)
+        if lease_token is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload is already completed or being processed"
+            )
+    
+    db_csv_upload = db.query(CSVUpload).filter(CSVUpload.id == upload_id).first()
+    columns_mapping = json.loads(db_csv_upload.columns_mapping)
     
-    # Process CSV file
     try:
-        sales_data_list = process_csv_file(file_path, columns_mapping, restaurant_id)
-        
-        # Validate data
-        validated_data = validate_sales_data(sales_data_list)
-        
-        # Insert data in batch
-        create_sales_data_batch(db, validated_data)
+        if chunks is None:
+            chunks = (
+                (validate_sales_data(sales_data_list), byte_offset, rows_processed)
+                for sales_data_list, byte_offset, rows_processed in iter_csv_chunks(
+                    db_csv_upload.file_path,
+                    columns_mapping,
+                    db_csv_upload.restaurant_id,
+                    start_offset=db_csv_upload.byte_offset,
+                    start_row=db_csv_upload.rows_processed,
+                    chunk_bytes=settings.UPLOAD_CHUNK_BYTES
+                )
+            )
+        for sales_data_list, byte_offset, rows_processed in chunks:
+            if byte_offset <= db_csv_upload.byte_offset:
+                continue  # already committed
+            create_sales_data_batch(db, sales_data_list, commit=False)
+            
+            # Checkpoint in the same transaction as the rows
+            checkpointed = db.query(CSVUpload).filter(
+                CSVUpload.id == upload_id,
+                CSVUpload.lease_token == lease_token
+            ).update({
+                CSVUpload.byte_offset: byte_offset,
+                CSVUpload.rows_processed: rows_processed,
+                CSVUpload.updated_at: func.now()
+            }, synchronize_session=False)
+            if not checkpointed:
+                db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Upload was taken over by another worker"
+                )
+            db.commit()
         
         # Mark upload as processed
-        db_csv_upload.processed = True
+        db.query(CSVUpload).filter(
+            CSVUpload.id == upload_id,
+            CSVUpload.lease_token == lease_token
+        ).update({
+            CSVUpload.status: "completed",
+            CSVUpload.processed: True,
+            CSVUpload.lease_token: None
+        }, synchronize_session=False)
         db.commit()
-        
-        return db_csv_upload
+    except HTTPException:
+        raise
     except Exception as e:
-        db.delete(db_csv_upload)
-        db.commit()
+        db.rollback()
+        _fail_csv_upload(db, upload_id, lease_token, e)
         raise e
-
-def get_sales_analytics(db: Session, restaurant_id: int, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None):
-    query = db.query(SalesData).filter(SalesData.restaurant_id == restaurant_id)
     
-    if start_date:
-        query = query.filter(SalesData.date >= start_date)
-    if end_date:
-        query = query.filter(SalesData.date <= end_date)
+    db.refresh(db_csv_upload)
+    return db_csv_upload
+
+def resume_interrupted_uploads():
+    """
+    Pick up uploads left unfinished by a worker that stopped, e.g. on restart,
+    including batch uploads that were recorded but never started
+    """
+    db = SessionLocal()
+    try:
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.UPLOAD_LEASE_SECONDS)
+        upload_ids = [
+            upload_id for (upload_id,) in
+            db.query(CSVUpload.id).filter(or_(
+                CSVUpload.status == "processing",
+                and_(CSVUpload.status == "pending", CSVUpload.updated_at < stale_before)
+            )).order_by(CSVUpload.id)
+        ]
+        for upload_id in upload_ids:
+            lease_token = claim_csv_upload(db, upload_id)
+            if lease_token is None:
+                continue
+            try:
+                process_csv_upload(db, upload_id, lease_token)
+            except Exception:
+                logger.exception("Failed to resume CSV upload %s", upload_id)
+    finally:
+        db.close()
+
+def watch_interrupted_uploads():
+    """
+    Resume interrupted uploads on startup and whenever a lease expires
+    """
+    while True:
+        try:
+            resume_interrupted_uploads()
+        except Exception:
+            logger.exception("Failed to resume interrupted CSV uploads")
+        time.sleep(settings.UPLOAD_LEASE_SECONDS)
+
+def upload_csv_batch(db: Session, restaurant_id: int, files: List[Tuple[str, str]], columns_mapping: Dict[str, Any], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Record an upload for every (file_path, filename) pair, parse the files in
+    the ingest process pool and load each as it finishes through the same
+    checkpointed loop as single uploads. Uploads interrupted here are resumed
+    by watch_interrupted_uploads.
+    """
+    uploads = [
+        (db_csv_upload.id, db_csv_upload.file_path, db_csv_upload.filename)
+        for db_csv_upload in (
+            create_csv_upload(db, restaurant_id, file_path, filename, columns_mapping)
+            for file_path, filename in files
+        )
+    ]
     
-    sales_data = query.all()
+    results = [None] * len(uploads)
+    parsed = parse_csv_files_parallel(
+        [file_path for _, file_path, _ in uploads],
+        columns_mapping,
+        restaurant_id,
+        settings.UPLOAD_CHUNK_BYTES,
+        max_workers
+    )
+    for index, chunks, error in parsed:
+        upload_id, _, filename = uploads[index]
+        result = {"filename": filename, "processed": False, "rows": 0, "upload_id": upload_id, "error": None}
+        lease_token = claim_csv_upload(db, upload_id)
+        if lease_token is None:
+            # Waited past its lease and was taken over by the resume watcher
+            result["error"] = "Upload is being processed by another worker"
+        elif error is not None:
+            _fail_csv_upload(db, upload_id, lease_token, error)
+            result["error"] = str(error)
+        else:
+            try:
+                db_csv_upload = process_csv_upload(db, upload_id, lease_token, chunks=chunks)
+                result.update(processed=True, rows=db_csv_upload.rows_processed)
+            except HTTPException as e:
+                result["error"] = e.detail
+            except Exception as e:
+                result["error"] = str(e)
+        results[index] = result
+    return results
+
+@phase("compute")
+def get_sales_analytics(db: Session, restaurant_id: int, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None):
+    # Dimensions stay as integer ids until after aggregation; rows come from
+    # both the hot table and the archive
+    df = load_sales_frame(
+        db, restaurant_id,
+        ["date", "item_id", "category_id", "quantity", "total_amount", "payment_method_id"],
+        start_date, end_date
+    )
     
-    if not sales_data:
+    if df.empty:
         return {
             "total_revenue": 0,
             "total_transactions": 0,
@@ -77,20 +290,17 @@ def get_sales_analytics(db: Session, restaurant_id: int, start_date: Optional[da
             "sales_by_payment_method": {},
             "sales_by_day_of_week": {},
             "sales_by_hour": {},
+            "unique_customers": 0,
+            "ticket_percentiles": {},
+            "heavy_hitter_items": [],
             "anomalies": [],
             "insights": []
         }
     
-    # Convert to DataFrame for easier analysis
-    df = pd.DataFrame([{
-        "date": s.date,
-        "item_name": s.item_name,
-        "category": s.category,
-        "quantity": s.quantity,
-        "price": s.price,
-        "total_amount": s.total_amount,
-        "payment_method": s.payment_method
-    } for s in sales_data])
+    df["date"] = pd.to_datetime(df["date"])
+    item_names = get_dimension_names(db, Item, restaurant_id)
+    category_names = get_dimension_names(db, Category, restaurant_id)
+    payment_method_names = get_dimension_names(db, PaymentMethod, restaurant_id)
     
     # Calculate metrics
     total_revenue = df["total_amount"].sum()
@@ -98,13 +308,16 @@ def get_sales_analytics(db: Session, restaurant_id: int, start_date: Optional[da
     average_transaction_value = total_revenue / total_transactions if total_transactions > 0 else 0
     
     # Top selling items
-    top_selling_items = df.groupby("item_name")["quantity"].sum().sort_values(ascending=False).head(10).to_dict()
+    top_selling_items = df.groupby("item_id")["quantity"].sum().sort_values(ascending=False).head(10).to_dict()
+    top_selling_items = {item_names[int(k)]: v for k, v in top_selling_items.items()}
     
     # Sales by category
-    sales_by_category = df.groupby("category")["total_amount"].sum().to_dict()
+    sales_by_category = df.groupby("category_id")["total_amount"].sum().to_dict()
+    sales_by_category = {category_names[int(k)]: v for k, v in sales_by_category.items()}
     
     # Sales by payment method
-    sales_by_payment_method = df.groupby("payment_method")["total_amount"].sum().to_dict()
+    sales_by_payment_method = df.groupby("payment_method_id")["total_amount"].sum().to_dict()
+    sales_by_payment_method = {payment_method_names[int(k)]: v for k, v in sales_by_payment_method.items()}
     
     # Sales by day of week
     df["day_of_week"] = df["date"].dt.day_name()
@@ -114,6 +327,9 @@ def get_sales_analytics(db: Session, restaurant_id: int, start_date: Optional[da
     df["hour"] = df["date"].dt.hour
     sales_by_hour = df.groupby("hour")["total_amount"].sum().to_dict()
     
+    # Distinct customers, ticket percentiles and heavy hitters from the daily sketches
+    sketch_summary = summarize_sketches(db, restaurant_id, start_date, end_date)
+    
     return {
         "total_revenue": total_revenue,
         "total_transactions": total_transactions,
@@ -123,6 +339,7 @@ def get_sales_analytics(db: Session, restaurant_id: int, start_date: Optional[da
         "sales_by_payment_method": sales_by_payment_method,
         "sales_by_day_of_week": sales_by_day_of_week,
         "sales_by_hour": sales_by_hour,
+        **sketch_summary,
         "anomalies": [],  # Will be populated by OpenAI service
         "insights": []    # Will be populated by OpenAI service
     }
\ No newline at end of file
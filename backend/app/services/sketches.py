@@ -0,0 +1,98 @@
+import pandas as pd
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from ..models.sales import SalesData, DailySalesSketch, Item
+from ..utils.sketches import HyperLogLog, QuantileSketch, SpaceSaving, hash_values
+from .dimensions import get_dimension_names
+
+TICKET_PERCENTILES = {"p25": 0.25, "p50": 0.5, "p75": 0.75, "p90": 0.9, "p99": 0.99}
+
+def update_daily_sketches(db: Session, sales_rows: List[SalesData]) -> None:
+    """
+    Fold a batch of new sales rows into the per-restaurant per-day sketches.
+    Runs inside the caller's transaction so sketches commit with the rows;
+    the caller holds the restaurant row locks, so concurrent ingests can't
+    both insert the same new day.
+    """
+    if not sales_rows:
+        return
+
+    df = pd.DataFrame([{
+        "restaurant_id": s.restaurant_id,
+        "date": s.date,
+        "item_id": s.item_id,
+        "quantity": s.quantity if s.quantity is not None else 1,
+        "total_amount": s.total_amount,
+        "customer_id": s.customer_id,
+        "transaction_id": s.transaction_id
+    } for s in sales_rows])
+    df["day"] = pd.to_datetime(df["date"]).dt.date
+    # Rows without a transaction id count as a ticket of their own
+    df["ticket"] = df["transaction_id"].where(df["transaction_id"].notna(), "row-" + df.index.astype(str))
+
+    for restaurant_id, restaurant_df in df.groupby("restaurant_id"):
+        days = restaurant_df["day"].unique().tolist()
+        existing = {
+            sketch.day: sketch
+            for sketch in db.query(DailySalesSketch).filter(
+                DailySalesSketch.restaurant_id == int(restaurant_id),
+                DailySalesSketch.day.in_(days)
+            ).with_for_update()
+        }
+
+        for day, group in restaurant_df.groupby("day"):
+            sketch = existing.get(day)
+            if sketch is None:
+                sketch = DailySalesSketch(restaurant_id=int(restaurant_id), day=day)
+                db.add(sketch)
+
+            customers = HyperLogLog.from_bytes(sketch.customers_hll)
+            customers.add_hashes(hash_values(group["customer_id"].dropna()))
+
+            tickets = QuantileSketch.from_json(sketch.ticket_quantiles)
+            tickets.add_values(group.groupby("ticket")["total_amount"].sum().to_numpy())
+
+            top_items = SpaceSaving.from_json(sketch.top_items)
+            quantities = group.groupby("item_id")["quantity"].sum()
+            top_items.add_weights({int(k): float(v) for k, v in quantities.items()})
+
+            sketch.customers_hll = customers.to_bytes()
+            sketch.ticket_quantiles = tickets.to_json()
+            sketch.top_items = top_items.to_json()
+
+def summarize_sketches(db: Session, restaurant_id: int, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, top_n: int = 10) -> Dict[str, Any]:
+    """
+    Merge the daily sketches covering a date range. Ranges are widened to
+    whole days.
+    """
+    query = db.query(DailySalesSketch).filter(DailySalesSketch.restaurant_id == restaurant_id)
+    if start_date:
+        query = query.filter(DailySalesSketch.day >= start_date.date())
+    if end_date:
+        query = query.filter(DailySalesSketch.day <= end_date.date())
+
+    customers = HyperLogLog()
+    tickets = QuantileSketch()
+    top_items = SpaceSaving()
+    found = False
+    for sketch in query:
+        found = True
+        customers.merge(HyperLogLog.from_bytes(sketch.customers_hll))
+        tickets.merge(QuantileSketch.from_json(sketch.ticket_quantiles))
+        top_items.merge(SpaceSaving.from_json(sketch.top_items))
+
+    if not found:
+        return {"unique_customers": 0, "ticket_percentiles": {}, "heavy_hitter_items": []}
+
+    item_names = get_dimension_names(db, Item, restaurant_id)
+    return {
+        "unique_customers": customers.count(),
+        "ticket_percentiles": {
+            name: tickets.quantile(q) for name, q in TICKET_PERCENTILES.items() if tickets.total
+        },
+        "heavy_hitter_items": [
+            {"item": item_names.get(item_id, str(item_id)), "quantity": count, "max_error": error}
+            for item_id, count, error in top_items.top(top_n)
+        ]
+    }
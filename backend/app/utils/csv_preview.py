@@ -0,0 +1,176 @@
+import csv
+import io
+import re
+import warnings
+import pandas as pd
+from typing import Dict, Any, Optional, Tuple
+from .upload_store import open_upload
+
+SAMPLE_BYTES = 64 * 1024
+SAMPLE_VALUES = 5
+
+# ColumnMapping field -> normalized header names that usually hold it
+COLUMN_SYNONYMS = {
+    "date": ["date", "datetime", "timestamp", "time", "orderdate", "saledate", "transactiondate", "createdat"],
+    "item_name": ["itemname", "item", "product", "productname", "menuitem", "dish", "name"],
+    "category": ["category", "cat", "itemcategory", "productcategory", "type", "group", "department"],
+    "quantity": ["quantity", "qty", "units", "unitssold", "count", "sold", "itemssold"],
+    "price": ["price", "unitprice", "itemprice", "priceeach", "rate"],
+    "total_amount": ["totalamount", "total", "amount", "linetotal", "totalprice", "revenue", "sales", "subtotal"],
+    "payment_method": ["paymentmethod", "payment", "paymenttype", "pay", "tender", "paidby"],
+    "customer_id": ["customerid", "customer", "clientid", "client", "guestid"],
+    "staff_id": ["staffid", "staff", "employeeid", "employee", "server", "cashier", "waiter"],
+    "notes": ["notes", "note", "comment", "comments", "remarks"],
+}
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+def complete_records(data: bytes, quote: bytes = b'"') -> bytes:
+    """
+    Trim data after its last newline that is not inside a quoted field
+    """
+    end, quotes = len(data), data.count(quote)
+    while True:
+        newline = data.rfind(b"\n", 0, end)
+        if newline <= 0:
+            return data
+        quotes -= data.count(quote, newline + 1, end)
+        if quotes % 2 == 0:
+            return data[:newline + 1]
+        end = newline
+
+def decode_sample(sample: bytes, truncated: bool = True) -> Tuple[str, str]:
+    """
+    Decode the head of a CSV, returning (text, encoding). A trailing partial
+    record is dropped when the sample was cut from a larger file.
+    """
+    if sample.startswith((b"\xff\xfe", b"\xfe\xff")):
+        encoding = "utf-16"
+    elif sample.startswith(b"\xef\xbb\xbf"):
+        encoding = "utf-8-sig"
+    else:
+        encoding = None
+
+    if truncated and encoding != "utf-16":
+        sample = complete_records(sample)
+
+    if encoding is not None:
+        return sample.decode(encoding, errors="replace"), encoding
+
+    for encoding in ("utf-8", "cp1252"):
+        try:
+            return sample.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue
+    return sample.decode("latin-1"), "latin-1"
+
+def sniff_dialect(text: str) -> Dict[str, Any]:
+    sniffer = csv.Sniffer()
+    try:
+        dialect = sniffer.sniff(text, delimiters=",;\t|")
+        delimiter, quotechar = dialect.delimiter, dialect.quotechar or '"'
+    except csv.Error:
+        delimiter, quotechar = ",", '"'
+    try:
+        has_header = sniffer.has_header(text)
+    except csv.Error:
+        has_header = True
+    return {"delimiter": delimiter, "quotechar": quotechar, "has_header": has_header}
+
+def sniff_csv_file(file_path: str) -> Dict[str, Any]:
+    """
+    Detect the encoding and dialect of a CSV on disk from its first bytes
+    """
+    with open_upload(file_path) as f:
+        sample = f.read(SAMPLE_BYTES)
+    text, encoding = decode_sample(sample, truncated=len(sample) == SAMPLE_BYTES)
+    return {"encoding": encoding, **sniff_dialect(text)}
+
+def infer_column_type(values: pd.Series) -> str:
+    values = values.dropna()
+    if values.empty:
+        return "empty"
+
+    numeric = pd.to_numeric(values, errors="coerce")
+    if numeric.notna().all():
+        return "integer" if (numeric % 1 == 0).all() else "float"
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        dates = pd.to_datetime(values.astype(str), errors="coerce")
+    if dates.notna().mean() >= 0.9:
+        return "datetime"
+
+    if values.astype(str).str.fullmatch(r"\s*[$€£]?\s*-?[\d,]+(\.\d+)?\s*").all():
+        return "currency"
+    return "string"
+
+def suggest_column_mapping(column_types: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """
+    Guess a ColumnMapping from header names, falling back to column types for
+    the required fields
+    """
+    normalized = {_normalize(column): column for column in column_types}
+    mapping: Dict[str, Optional[str]] = {}
+    used = set()
+
+    for field, synonyms in COLUMN_SYNONYMS.items():
+        mapping[field] = None
+        for synonym in synonyms:
+            column = normalized.get(synonym)
+            if column is not None and column not in used:
+                mapping[field] = column
+                used.add(column)
+                break
+
+    fallbacks = {
+        "date": ("datetime",),
+        "price": ("float", "currency"),
+        "item_name": ("string",),
+    }
+    for field, types in fallbacks.items():
+        if mapping[field] is None:
+            for column, column_type in column_types.items():
+                if column not in used and column_type in types:
+                    mapping[field] = column
+                    used.add(column)
+                    break
+
+    return mapping
+
+def preview_csv_sample(sample: bytes, truncated: bool = True) -> Dict[str, Any]:
+    """
+    Build a column preview from the first bytes of a CSV upload
+    """
+    text, encoding = decode_sample(sample, truncated)
+    dialect = sniff_dialect(text)
+
+    df = pd.read_csv(
+        io.StringIO(text),
+        sep=dialect["delimiter"],
+        quotechar=dialect["quotechar"],
+        dtype=str,
+        skipinitialspace=True
+    )
+    columns = [str(column) for column in df.columns]
+
+    column_types = {}
+    column_details = []
+    for column in df.columns:
+        column_type = infer_column_type(df[column])
+        column_types[str(column)] = column_type
+        column_details.append({
+            "name": str(column),
+            "inferred_type": column_type,
+            "sample_values": df[column].dropna().head(SAMPLE_VALUES).tolist()
+        })
+
+    return {
+        "columns": columns,
+        "encoding": encoding,
+        **dialect,
+        "sampled_rows": len(df),
+        "column_details": column_details,
+        "suggested_mapping": suggest_column_mapping(column_types)
+    }
@@ -1,12 +1,75 @@
 import pandas as pd
-import os
-from typing import List, Dict, Any
+import io
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, List, Dict, Any, Iterator, Tuple, Optional
 from datetime import datetime
 from ..schemas.sales import SalesDataCreate
+from .data_validator import validate_sales_data
+from .csv_preview import sniff_csv_file
+from .upload_store import is_csv, open_upload, store_upload
 
-def process_csv_file(file_path: str, columns_mapping: Dict[str, Any], restaurant_id: int) -> List[SalesDataCreate]:
-    df = pd.read_csv(file_path)
-    
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+_ingest_pool: Optional[ProcessPoolExecutor] = None
+
+def iter_csv_chunks(
+    file_path: str,
+    columns_mapping: Dict[str, Any],
+    restaurant_id: int,
+    start_offset: int = 0,
+    start_row: int = 0,
+    chunk_bytes: int = 8 * 1024 * 1024
+) -> Iterator[Tuple[List[SalesDataCreate], int, int]]:
+    """
+    Parse a CSV in record-aligned chunks starting at a byte offset, yielding
+    (sales_data_list, end_offset, rows_read) so callers can checkpoint after each
+    """
+    dialect = sniff_csv_file(file_path)
+    quote = dialect["quotechar"].encode()
+    if dialect["encoding"].startswith("utf-16"):
+        # Newlines are not single bytes; parse the whole file as one chunk
+        chunk_bytes = -1
+
+    def _read_record_end(f, data: bytes) -> bytes:
+        # Extend data to the end of a line that is not inside a quoted field
+        while True:
+            line = f.readline()
+            data += line
+            if not line or data.count(quote) % 2 == 0:
+                return data
+
+    # Offsets count decompressed bytes; compressed streams cannot seek, so
+    # the position is tracked here and resuming skips forward by reading
+    with open_upload(file_path) as f:
+        header = _read_record_end(f, b"")
+        position = len(header)
+        while position < start_offset:
+            skipped = f.read(min(start_offset - position, 1024 * 1024))
+            if not skipped:
+                break
+            position += len(skipped)
+        rows_read = start_row
+
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            if not block.endswith(b"\n") or block.count(quote) % 2:
+                block = _read_record_end(f, block)
+            position += len(block)
+
+            df = pd.read_csv(
+                io.StringIO((header + block).decode(dialect["encoding"])),
+                sep=dialect["delimiter"],
+                quotechar=dialect["quotechar"]
+            )
+            rows_read += len(df)
+            yield map_sales_dataframe(df, columns_mapping, restaurant_id), position, rows_read
+
+def map_sales_dataframe(df: pd.DataFrame, columns_mapping: Dict[str, Any], restaurant_id: int) -> List[SalesDataCreate]:
     mapped_df = pd.DataFrame()
     
     for target_col, source_col in columns_mapping.items():
@@ -42,17 +105,95 @@ def process_csv_file(file_path: str, columns_mapping: Dict[str, Any], restaurant
     
     return sales_data_list
 
-def get_csv_columns(file_path: str) -> List[str]:
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
 
-    df = pd.read_csv(file_path, nrows=1)
-    return df.columns.tolist()
+def extract_csv_members(archive: BinaryIO, archive_name: str, upload_dir: str) -> List[Tuple[str, str]]:
+    """
+    Store the CSV members of a zip or tar archive in the upload store,
+    returning (file_path, member_name) pairs
+    """
+    extracted = []
+    if archive_name.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive) as zip_archive:
+            for info in zip_archive.infolist():
+                if not info.is_dir() and is_csv(info.filename):
+                    with zip_archive.open(info) as source:
+                        extracted.append((store_upload(source, upload_dir), info.filename))
+    else:
+        with tarfile.open(fileobj=archive) as tar_archive:
+            for member in tar_archive.getmembers():
+                if member.isfile() and is_csv(member.name):
+                    with tar_archive.extractfile(member) as source:
+                        extracted.append((store_upload(source, upload_dir), member.name))
 
-def save_uploaded_file(file_content: bytes, filename: str, upload_dir: str) -> str:
+    return extracted
 
-    os.makedirs(upload_dir, exist_ok=True)
-    file_path = os.path.join(upload_dir, filename)
-    
-    with open(file_path, "wb") as f:
-        f.write(file_content)
-    
-    return file_path
\ No newline at end of file
+def parse_csv_upload(
+    file_path: str,
+    columns_mapping: Dict[str, Any],
+    restaurant_id: int,
+    chunk_bytes: int
+) -> List[Tuple[List[SalesDataCreate], int, int]]:
+    """
+    Parse and validate a whole file into the (sales_data_list, end_offset,
+    rows_read) chunks that ingestion checkpoints after
+    """
+    return [
+        (validate_sales_data(sales_data_list), end_offset, rows_read)
+        for sales_data_list, end_offset, rows_read
+        in iter_csv_chunks(file_path, columns_mapping, restaurant_id, chunk_bytes=chunk_bytes)
+    ]
+
+def get_ingest_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    global _ingest_pool
+    if _ingest_pool is None:
+        _ingest_pool = ProcessPoolExecutor(max_workers=max_workers)
+    return _ingest_pool
+
+def shutdown_ingest_pool() -> None:
+    global _ingest_pool
+    if _ingest_pool is not None:
+        _ingest_pool.shutdown(wait=False, cancel_futures=True)
+        _ingest_pool = None
+
+def _discard_broken_pool(pool: ProcessPoolExecutor) -> None:
+    # A worker died (e.g. killed for memory); the pool refuses all further
+    # work, so drop it and let the next call start a new one
+    if _ingest_pool is pool:
+        shutdown_ingest_pool()
+
+def parse_csv_files_parallel(
+    file_paths: List[str],
+    columns_mapping: Dict[str, Any],
+    restaurant_id: int,
+    chunk_bytes: int,
+    max_workers: Optional[int] = None
+) -> Iterator[Tuple[int, Optional[List[Tuple[List[SalesDataCreate], int, int]]], Optional[Exception]]]:
+    """
+    Parse and validate files across the ingest process pool, yielding
+    (index, chunks, error) as each file finishes
+    """
+    def submit_all(pool: ProcessPoolExecutor):
+        return {
+            pool.submit(parse_csv_upload, file_path, columns_mapping, restaurant_id, chunk_bytes): index
+            for index, file_path in enumerate(file_paths)
+        }
+
+    pool = get_ingest_pool(max_workers)
+    try:
+        futures = submit_all(pool)
+    except BrokenProcessPool:
+        # Broken since its last use; retry once on a fresh pool
+        _discard_broken_pool(pool)
+        pool = get_ingest_pool(max_workers)
+        futures = submit_all(pool)
+    for future in as_completed(futures):
+        index = futures[future]
+        try:
+            yield index, future.result(), None
+        except BrokenProcessPool as e:
+            _discard_broken_pool(pool)
+            yield index, None, e
+        except Exception as e:
+            yield index, None, e
@@ -0,0 +1,74 @@
+import numpy as np
+from typing import Sequence
+
+# Smoothing parameters tried for every series; each series keeps the
+# combination with the lowest one-step-ahead squared error
+LEVEL_GRID = (0.1, 0.3, 0.6)
+SEASON_GRID = (0.05, 0.2, 0.4)
+TREND_SMOOTHING = 0.05
+TREND_DAMPING = 0.9
+
+def holt_winters_batch(
+    series: np.ndarray,
+    season_length: int,
+    horizon: int,
+    level_grid: Sequence[float] = LEVEL_GRID,
+    season_grid: Sequence[float] = SEASON_GRID
+) -> np.ndarray:
+    """
+    Forecast `horizon` steps for every row of a (series, time) matrix with
+    additive, damped-trend Holt-Winters. All rows and all parameter
+    combinations are fitted together, one vectorized step per time point.
+    Returns a (series, horizon) array clipped at zero.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    n_series, n_steps = series.shape
+    if n_series == 0 or horizon <= 0:
+        return np.zeros((n_series, max(horizon, 0)))
+    if n_steps == 1:
+        # A single observation only gives a level
+        return np.clip(np.repeat(series, horizon, axis=1), 0, None)
+    # The trend is only initialized from data spanning two whole seasons
+    has_two_seasons = n_steps >= 2 * season_length
+    if not has_two_seasons:
+        # Too short to estimate a season; fall back to damped Holt
+        season_length, season_grid = 1, (0.0,)
+
+    alphas, gammas = np.meshgrid(level_grid, season_grid, indexing="ij")
+    alphas = alphas.reshape(-1, 1)
+    gammas = gammas.reshape(-1, 1)
+    n_params = len(alphas)
+
+    # Initial state from the first two seasons, shared by every combination
+    first = series[:, :season_length]
+    level = np.tile(first.mean(axis=1), (n_params, 1))
+    if has_two_seasons:
+        second = series[:, season_length:2 * season_length]
+        trend = np.tile((second.mean(axis=1) - first.mean(axis=1)) / season_length, (n_params, 1))
+    else:
+        trend = np.zeros((n_params, n_series))
+    seasonal = np.tile((first - first.mean(axis=1, keepdims=True))[None], (n_params, 1, 1))
+    sse = np.zeros((n_params, n_series))
+
+    for t in range(n_steps):
+        observed = series[:, t]
+        season_index = t % season_length
+        season = seasonal[:, :, season_index]
+        damped_trend = TREND_DAMPING * trend
+        predicted = level + damped_trend + season
+        sse += (observed - predicted) ** 2
+
+        new_level = alphas * (observed - season) + (1 - alphas) * (level + damped_trend)
+        trend = TREND_SMOOTHING * (new_level - level) + (1 - TREND_SMOOTHING) * damped_trend
+        seasonal[:, :, season_index] = gammas * (observed - new_level) + (1 - gammas) * season
+        level = new_level
+
+    best = sse.argmin(axis=0)
+    rows = np.arange(n_series)
+    level, trend, seasonal = level[best, rows], trend[best, rows], seasonal[best, rows]
+
+    steps = np.arange(1, horizon + 1)
+    damping = np.cumsum(TREND_DAMPING ** steps)
+    season_index = (n_steps + steps - 1) % season_length
+    forecast = level[:, None] + trend[:, None] * damping[None, :] + seasonal[:, season_index]
+    return np.clip(forecast, 0, None)
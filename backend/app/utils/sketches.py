@@ -0,0 +1,187 @@
+import json
+import math
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any, Optional, Tuple
+
+HLL_PRECISION = 12
+QUANTILE_ACCURACY = 0.01
+TOP_K = 50
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """
+    Stable 64-bit hashes, identical across processes and restarts
+    """
+    return pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy(dtype=np.uint64)
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    x = x.copy()
+    length = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = x >= (np.uint64(1) << np.uint64(shift))
+        length[mask] += shift
+        x[mask] >>= np.uint64(shift)
+    length += (x > 0).astype(np.uint8)
+    return length
+
+class HyperLogLog:
+    """
+    Distinct-count sketch; merging takes the register-wise max
+    """
+
+    def __init__(self, registers: Optional[np.ndarray] = None, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if len(hashes) == 0:
+            return
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - _bit_length(remainder).astype(np.int64) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "HyperLogLog":
+        if not data:
+            return cls()
+        registers = np.frombuffer(data, dtype=np.uint8).copy()
+        return cls(registers, precision=int(math.log2(len(registers))))
+
+class QuantileSketch:
+    """
+    Log-bucketed histogram with relative value error bounded by `accuracy`;
+    merging adds bucket counts
+    """
+
+    def __init__(self, accuracy: float = QUANTILE_ACCURACY, buckets: Optional[Dict[int, int]] = None, zero_count: int = 0):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.buckets = buckets or {}
+        self.zero_count = zero_count
+
+    @property
+    def total(self) -> int:
+        return self.zero_count + sum(self.buckets.values())
+
+    def add_values(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        positive = values[values > 0]
+        self.zero_count += int(len(values) - len(positive))
+        if len(positive):
+            indexes = np.ceil(np.log(positive) / math.log(self.gamma)).astype(np.int64)
+            keys, counts = np.unique(indexes, return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        self.zero_count += other.zero_count
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.total
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_json(self) -> str:
+        return json.dumps({"a": self.accuracy, "z": self.zero_count, "b": self.buckets})
+
+    @classmethod
+    def from_json(cls, data: Optional[str]) -> "QuantileSketch":
+        if not data:
+            return cls()
+        raw = json.loads(data)
+        return cls(raw["a"], {int(k): v for k, v in raw["b"].items()}, raw["z"])
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving heavy hitters over at most `k` counters. Counts are
+    upper bounds; `errors` holds how much each count may overestimate.
+    """
+
+    def __init__(self, k: int = TOP_K, counts: Optional[Dict[Any, float]] = None, errors: Optional[Dict[Any, float]] = None):
+        self.k = k
+        self.counts = counts or {}
+        self.errors = errors or {}
+
+    def _min_count(self) -> float:
+        return min(self.counts.values()) if len(self.counts) >= self.k else 0
+
+    def add_weights(self, weights: Dict[Any, float]) -> None:
+        for item, weight in sorted(weights.items(), key=lambda kv: -kv[1]):
+            if item in self.counts:
+                self.counts[item] += weight
+            elif len(self.counts) < self.k:
+                self.counts[item] = weight
+                self.errors[item] = 0
+            else:
+                evicted = min(self.counts, key=self.counts.get)
+                floor = self.counts.pop(evicted)
+                self.errors.pop(evicted, None)
+                self.counts[item] = floor + weight
+                self.errors[item] = floor
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        # Items missing from a full summary may still have up to its min count
+        own_floor, other_floor = self._min_count(), other._min_count()
+        items = set(self.counts) | set(other.counts)
+        counts = {
+            item: self.counts.get(item, own_floor) + other.counts.get(item, other_floor)
+            for item in items
+        }
+        errors = {
+            item: self.errors.get(item, own_floor) + other.errors.get(item, other_floor)
+            for item in items
+        }
+        kept = sorted(counts, key=counts.get, reverse=True)[:self.k]
+        self.counts = {item: counts[item] for item in kept}
+        self.errors = {item: errors[item] for item in kept}
+        return self
+
+    def top(self, n: int = 10) -> List[Tuple[Any, float, float]]:
+        ranked = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:n]
+        return [(item, count, self.errors.get(item, 0)) for item, count in ranked]
+
+    def to_json(self) -> str:
+        return json.dumps({"k": self.k, "c": [[item, count, self.errors.get(item, 0)] for item, count in self.counts.items()]})
+
+    @classmethod
+    def from_json(cls, data: Optional[str]) -> "SpaceSaving":
+        if not data:
+            return cls()
+        raw = json.loads(data)
+        return cls(
+            raw["k"],
+            {item: count for item, count, _ in raw["c"]},
+            {item: error for item, _, error in raw["c"]}
+        )
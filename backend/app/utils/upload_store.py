@@ -0,0 +1,134 @@
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import zlib
+from typing import BinaryIO, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; .csv.zst uploads are rejected without it
+    zstandard = None
+
+CSV_EXTENSIONS = ('.csv', '.csv.gz', '.csv.zst')
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COPY_BUFFER = 1024 * 1024
+
+def is_csv(filename: str) -> bool:
+    return filename.lower().endswith(CSV_EXTENSIONS)
+
+def detect_compression(source: BinaryIO) -> str:
+    """
+    Identify a stream as "gzip", "zstd" or "none" from its magic bytes,
+    leaving the stream position unchanged
+    """
+    position = source.tell()
+    magic = source.read(len(ZSTD_MAGIC))
+    source.seek(position)
+    if magic.startswith(GZIP_MAGIC):
+        return "gzip"
+    if magic.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return "none"
+
+def _decompressing_reader(source: BinaryIO, compression: str) -> BinaryIO:
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=source, mode="rb")
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd-compressed uploads require the zstandard package")
+        reader = zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True)
+        return io.BufferedReader(reader, COPY_BUFFER)
+    return source
+
+def open_upload(source: Union[str, BinaryIO]) -> BinaryIO:
+    """
+    Open a stored upload (or an uploaded file object) as a binary stream of
+    plain CSV bytes, decompressing gzip or zstd on the fly. Offsets from
+    tell()/seek() on the result refer to the decompressed CSV.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            compression = detect_compression(f)
+        if compression == "gzip":
+            # Owns and closes the underlying file, unlike GzipFile(fileobj=...)
+            return gzip.open(source, "rb")
+        source = open(source, "rb")
+        return _decompressing_reader(source, compression)
+    return _decompressing_reader(source, detect_compression(source))
+
+def read_head(source: BinaryIO, limit: int) -> Tuple[bytes, bool]:
+    """
+    Read up to `limit` bytes of CSV from the start of an upload that may be
+    cut off mid-stream, such as the first bytes of a compressed file. Returns
+    (data, truncated); truncated is set when more CSV may follow the data.
+    """
+    reader = open_upload(source)
+    data = b""
+    try:
+        # read1 hands back what each step decompressed, so nothing is lost
+        # when the compressed stream ends early
+        while len(data) < limit:
+            block = reader.read1(limit - len(data))
+            if not block:
+                break
+            data += block
+    except EOFError:
+        # gzip stream cut before its end marker
+        if not data:
+            raise
+        return data, True
+    return data, len(data) == limit
+
+def store_upload(source: BinaryIO, upload_dir: str) -> str:
+    """
+    Store an uploaded CSV, plain or pre-compressed, under the SHA-256 of its
+    decompressed content and return the stored path. Plain CSVs are gzipped
+    on the way in; identical content is only ever stored once.
+    """
+    objects_dir = os.path.join(upload_dir, "objects")
+    os.makedirs(objects_dir, exist_ok=True)
+    compression = detect_compression(source)
+    digest = hashlib.sha256()
+    hashed = compression == "none"
+
+    fd, temp_path = tempfile.mkstemp(dir=objects_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if compression == "none":
+                compression = "gzip"
+                compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+                for block in iter(lambda: source.read(COPY_BUFFER), b""):
+                    digest.update(block)
+                    f.write(compressor.compress(block))
+                f.write(compressor.flush())
+            else:
+                shutil.copyfileobj(source, f, COPY_BUFFER)
+
+        if not hashed:
+            # Pre-compressed upload: hash what it expands to, streaming
+            with open_upload(temp_path) as reader:
+                for block in iter(lambda: reader.read(COPY_BUFFER), b""):
+                    digest.update(block)
+
+        name = digest.hexdigest()
+        extension = ".csv.zst" if compression == "zstd" else ".csv.gz"
+        target_dir = os.path.join(objects_dir, name[:2])
+        os.makedirs(target_dir, exist_ok=True)
+        for existing in (".csv.gz", ".csv.zst"):
+            existing_path = os.path.join(target_dir, name + existing)
+            if os.path.exists(existing_path):
+                os.remove(temp_path)
+                return existing_path
+
+        file_path = os.path.join(target_dir, name + extension)
+        os.replace(temp_path, file_path)
+        return file_path
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,95 @@
+import { useEffect, useRef } from 'react';
+import { dashboardService } from '../services/dashboardService';
+
+const API_BASE_URL = import.meta.env.VITE_API_URL;
+const RECONNECT_DELAY_MS = 5000;
+
+const addCounts = (current = {}, increments = {}) => {
+  const merged = { ...current };
+  Object.entries(increments).forEach(([key, value]) => {
+    merged[key] = (merged[key] || 0) + value;
+  });
+  return merged;
+};
+
+// Fold a pushed sales delta into analytics data from GET /analytics/
+export const applySalesDelta = (data, delta) => {
+  const totalRevenue = (data.total_revenue || 0) + delta.total_revenue;
+  const totalTransactions = (data.total_transactions || 0) + delta.total_transactions;
+  const itemQuantities = addCounts(
+    Object.fromEntries((data.top_selling_items || []).map(({ item, quantity }) => [item, quantity])),
+    delta.item_quantities
+  );
+
+  return {
+    ...data,
+    total_revenue: totalRevenue,
+    total_transactions: totalTransactions,
+    average_transaction_value: totalTransactions > 0 ? totalRevenue / totalTransactions : 0,
+    top_selling_items: Object.entries(itemQuantities)
+      .map(([item, quantity]) => ({ item, quantity }))
+      .sort((a, b) => b.quantity - a.quantity)
+      .slice(0, 10),
+    sales_by_category: addCounts(data.sales_by_category, delta.sales_by_category),
+    sales_by_payment_method: addCounts(data.sales_by_payment_method, delta.sales_by_payment_method),
+    sales_by_day_of_week: addCounts(data.sales_by_day_of_week, delta.sales_by_day_of_week),
+    sales_by_hour: addCounts(data.sales_by_hour, delta.sales_by_hour),
+  };
+};
+
+// Subscribe to the aggregate deltas the backend pushes as sales are ingested.
+// onResync is called once connected and whenever deltas were missed, so the
+// caller can load a full snapshot.
+export const useLiveSales = (restaurantId, startDate, endDate, { onDelta, onResync }) => {
+  const handlers = useRef({ onDelta, onResync });
+  handlers.current = { onDelta, onResync };
+
+  useEffect(() => {
+    if (!restaurantId || typeof EventSource === 'undefined') {
+      return undefined;
+    }
+
+    let source = null;
+    let retryTimer = null;
+    let cancelled = false;
+    const retry = () => {
+      if (!cancelled) retryTimer = setTimeout(connect, RECONNECT_DELAY_MS);
+    };
+
+    // Tickets are only valid for a minute, so every connection gets a new one
+    // instead of letting EventSource reconnect with a stale ticket
+    async function connect() {
+      let ticket;
+      try {
+        ({ ticket } = await dashboardService.getLiveTicket(restaurantId));
+      } catch (error) {
+        retry();
+        return;
+      }
+      if (cancelled) return;
+
+      const params = new URLSearchParams({ restaurant_id: restaurantId, ticket });
+      if (startDate) params.append('start_date', startDate);
+      if (endDate) params.append('end_date', endDate);
+
+      source = new EventSource(`${API_BASE_URL}/analytics/live?${params}`);
+      const resync = () => handlers.current.onResync?.();
+      source.addEventListener('ready', resync);
+      source.addEventListener('resync', resync);
+      source.addEventListener('sales', (event) => {
+        handlers.current.onDelta?.(JSON.parse(event.data));
+      });
+      source.onerror = () => {
+        source.close();
+        retry();
+      };
+    }
+
+    connect();
+    return () => {
+      cancelled = true;
+      clearTimeout(retryTimer);
+      source?.close();
+    };
+  }, [restaurantId, startDate, endDate]);
+};
@@ -16,6 +16,7 @@ import {
 import { useAuth } from '../../context/AuthContext';
 import dashboardService from '../../services/dashboardService';
 import { getDateRange } from '../../utils/dateUtils';
+import { useLiveSales, applySalesDelta } from '../../hooks/useLiveSales';
 import Dashboard from '../../components/dashboard/Dashboard/Dashboard';
 import AnomalyAlert from '../../components/dashboard/AnomalyAlert/AnomalyAlert';
 import MetricCard from '../../components/dashboard/MetricCard/MetricCard';
@@ -59,6 +60,13 @@ const DashboardPage = () => {
     }
   }, [selectedRestaurant, dateRange]);
 
+  // Fold in sales as they are ingested instead of polling
+  const liveRange = getDateRange(dateRange);
+  useLiveSales(selectedRestaurant, liveRange.startDate, liveRange.endDate, {
+    onDelta: (delta) => setDashboardData((data) => applySalesDelta(data, delta)),
+    onResync: () => fetchDashboardData(),
+  });
+
   const fetchRestaurants = async () => {
     try {
       setLoading(true);
@@ -121,7 +129,7 @@ const DashboardPage = () => {
   // CSV Upload handlers
   const handleFileSelect = (event) => {
     const file = event.target.files[0];
-    if (file && file.type === 'text/csv') {
+    if (file && /\.csv(\.gz|\.zst)?$/i.test(file.name)) {
       setCsvFile(file);
       previewCSVColumns(file);
     } else {
@@ -179,10 +187,11 @@ const DashboardPage = () => {
     }
   };
 
+  // Fields of the /analytics/ response, which live deltas also update
   const metricCards = [
     {
       title: 'Total Revenue',
-      value: dashboardData.summary?.total_revenue || 0,
+      value: dashboardData.total_revenue || 0,
       change: 12.5,
       changeType: 'positive',
       icon: FiPlus,
@@ -192,7 +201,7 @@ const DashboardPage = () => {
     },
     {
       title: 'Transactions',
-      value: dashboardData.summary?.total_transactions || 0,
+      value: dashboardData.total_transactions || 0,
       change: 8.2,
       changeType: 'positive',
       icon: FiDownload,
@@ -202,7 +211,7 @@ const DashboardPage = () => {
     },
     {
       title: 'Avg. Order Value',
-      value: dashboardData.summary?.avg_transaction_value || 0,
+      value: dashboardData.average_transaction_value || 0,
       change: -2.3,
       changeType: 'negative',
       icon: FiCalendar,
@@ -212,7 +221,7 @@ const DashboardPage = () => {
     },
     {
       title: 'Top Item Sales',
-      value: dashboardData.top_items?.[0]?.total_quantity || 0,
+      value: dashboardData.top_selling_items?.[0]?.quantity || 0,
       change: 15.8,
       changeType: 'positive',
       icon: FiRefreshCw,
@@ -291,7 +300,7 @@ const DashboardPage = () => {
             <input
               ref={fileInputRef}
               type="file"
-              accept=".csv"
+              accept=".csv,.gz,.zst"
               onChange={handleFileSelect}
               style={{ display: 'none' }}
             />
@@ -524,10 +533,10 @@ const DashboardPage = () => {
                 <div className={styles.fileDropArea}>
                   <FiUpload size={48} />
                   <h3>Drop your CSV file here or click to browse</h3>
-                  <p>Supported format: CSV</p>
+                  <p>Supported formats: CSV, CSV.GZ, CSV.ZST</p>
                   <input
                     type="file"
-                    accept=".csv"
+                    accept=".csv,.gz,.zst"
                     onChange={handleFileSelect}
                     className={styles.fileInput}
                   />
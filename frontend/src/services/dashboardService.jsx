@@ -10,13 +10,27 @@ export const dashboardService = {
     }
   },
 
-  // Get analytics data
+  // Get analytics data; a GET so the browser can revalidate with If-None-Match
   getAnalytics: async (restaurantId, startDate, endDate) => {
     try {
-      const response = await api.post('/analytics/', {
-        restaurant_id: restaurantId,
-        start_date: startDate,
-        end_date: endDate,
+      const response = await api.get('/analytics/', {
+        params: {
+          restaurant_id: restaurantId,
+          start_date: startDate,
+          end_date: endDate,
+        },
+      });
+      return response;
+    } catch (error) {
+      throw error;
+    }
+  },
+
+  // Short-lived ticket for opening the live sales stream of a restaurant
+  getLiveTicket: async (restaurantId) => {
+    try {
+      const response = await api.post('/analytics/live/ticket', null, {
+        params: { restaurant_id: restaurantId },
       });
       return response;
     } catch (error) {
@@ -27,8 +41,9 @@ export const dashboardService = {
   // Upload CSV and get column preview
   previewCSVColumns: async (file) => {
     try {
+      // The server only reads the first 64 KB, so don't send the rest
       const formData = new FormData();
-      formData.append('file', file);
+      formData.append('file', file.slice(0, 65536), file.name);
       
       const response = await api.post('/upload/preview-columns', formData, {
         headers: {